@@ -0,0 +1,96 @@
+"""
+Version-stamped cache for read paths.
+
+Every committed change bumps the data_version row (see app/service/changes.py).
+A cached value is reused for as long as the version it was computed at is
+still current, so many viewers of the same page cost one query per change
+instead of one per request. The version itself is re-read at most every
+CACHE_VERSION_TTL seconds, which bounds how stale a hit can be; 0 re-reads it
+on every lookup. Concurrent misses of the same key share one computation.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+CACHE_VERSION_TTL = float(os.getenv("CACHE_VERSION_TTL", "1"))  # seconds
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))  # least recently used go first
+
+class VersionedCache:
+    def __init__(self, read_version: Callable[[], Awaitable[int]], ttl: float = CACHE_VERSION_TTL,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        """read_version() returns the current data version."""
+        self.read_version = read_version
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[Hashable, tuple[int, object]] = OrderedDict()
+        self._computing: dict[tuple[int, Hashable], asyncio.Future] = {}
+        self._version: int | None = None
+        self._checked = 0.0  # time.monotonic() of the last version read
+        self._reading: asyncio.Future | None = None
+        # metrics
+        self.hits = 0
+        self.misses = 0          # computations run
+        self.version_reads = 0
+
+    async def version(self) -> int:
+        """The current data version, re-read at most every `ttl` seconds."""
+        if self._version is not None and time.monotonic() - self._checked < self.ttl:
+            return self._version
+        if self._reading is None:
+            self._reading = asyncio.ensure_future(self._read())
+        return await asyncio.shield(self._reading)
+
+    def invalidate(self) -> None:
+        """Re-read the version on the next lookup, e.g. right after this process changed data."""
+        self._version = None
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable]) -> tuple[object, int]:
+        """The value for `key` and the version it is valid for; compute() runs when it is missing or stale."""
+        version = await self.version()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] >= version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[0]
+        future = self._computing.get((version, key))
+        if future is None:
+            self.misses += 1
+            future = self._computing[(version, key)] = asyncio.ensure_future(self._compute(version, key, compute))
+        else:
+            self.hits += 1
+        return await asyncio.shield(future), version
+
+    async def _read(self) -> int:
+        started = time.monotonic()
+        try:
+            version = await self.read_version()
+            self.version_reads += 1
+            self._version, self._checked = version, started
+            return version
+        finally:
+            self._reading = None
+
+    async def _compute(self, version: int, key: Hashable, compute: Callable[[], Awaitable]):
+        try:
+            value = await compute()
+        finally:
+            del self._computing[(version, key)]
+        current = self._entries.get(key)
+        if current is None or current[0] <= version:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "version_reads": self.version_reads,
+            "version": self._version,
+        }
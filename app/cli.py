@@ -4,22 +4,43 @@ from rich.table import Table
 from rich.console import Console
 
 from app.utils.generator import random_trade
-from app.service import client as grpc_client
+from app.service import client as grpc_client, feeds
 
 app = typer.Typer(add_completion=False)
 console = Console()
 
+def _run(call):
+    """Run one client call on a short-lived client that is closed before the loop ends."""
+    async def main():
+        async with grpc_client.ReconcileClient() as client:
+            return await call(client)
+    return asyncio.run(main())
+
+async def _collect(stream):
+    return [item async for item in stream]
+
 @app.command()
-def ingest(count: int = typer.Argument(20, help="Number of random trades to ingest")):
+def ingest(
+    count: int = typer.Argument(20, help="Number of random trades to ingest"),
+    batch_size: int = typer.Option(0, help="Pipeline in acknowledged batches of this size (0 = single stream)"),
+    key_trades: bool = typer.Option(False, help="Give trades random external_ids so batches can be re-sent "
+                                                "after a dropped stream (slower staged insert on the server)"),
+):
     """Generate and send random trades to the gRPC service."""
     trades = [random_trade() for _ in range(count)]
-    inserted = asyncio.run(grpc_client.ingest_trades(trades))
+    if batch_size > 0:
+        acks = _run(lambda c: c.ingest_trades_stream(trades, batch_size, key_trades=key_trades))
+        inserted = sum(len(a.trade_ids) - a.duplicates for a in acks)
+        breaks = sum(a.breaks for a in acks)
+        console.print(f"[green]Inserted {inserted} trades in {len(acks)} batches[/green] ([red]{breaks} breaks[/red])")
+        return
+    inserted = _run(lambda c: c.ingest_trades(trades))
     console.print(f"[green]Inserted {inserted} trades[/green]")
 
 @app.command()
-def positions():
+def positions(symbol: str = typer.Option("", help="Only show this symbol")):
     """Display current net positions."""
-    items = asyncio.run(grpc_client.get_positions())
+    items = _run(lambda c: _collect(c.stream_positions(symbol=symbol)))
     table = Table(title="Net Positions")
     table.add_column("Symbol")
     table.add_column("Net Qty", justify="right")
@@ -29,9 +50,12 @@ def positions():
     console.print(table)
 
 @app.command()
-def breaks():
+def breaks(
+    symbol: str = typer.Option("", help="Only breaks on this symbol"),
+    reason: str = typer.Option("", help="Only breaks with this exact reason"),
+):
     """Show breaks detected by reconciliation."""
-    items = asyncio.run(grpc_client.get_breaks())
+    items = _run(lambda c: _collect(c.stream_breaks(symbol=symbol, reason=reason)))
     table = Table(title="Breaks", style="red")
     table.add_column("Trade ID")
     table.add_column("Reason")
@@ -40,5 +64,46 @@ def breaks():
         table.add_row(str(b.trade_id), b.reason, b.detected_ts)
     console.print(table)
 
+@app.command("load-counterparty")
+def load_counterparty(
+    path: str = typer.Argument(..., help="CSV or FIX drop-copy file, optionally .gz"),
+    fmt: str = typer.Option("", "--format", help="csv or fix (default: from the file extension)"),
+    chunk_size: int = typer.Option(5000, help="Rows per streamed batch"),
+):
+    """Stream a counterparty file to the server, then fuzzy-match rows without our trade_id."""
+    try:
+        summary = _run(lambda c: c.load_counterparty(feeds.read_chunks(path, fmt, chunk_size)))
+    except ValueError as exc:
+        console.print(f"[red]{path}: {exc}[/red]")
+        raise typer.Exit(1)
+    console.print(
+        f"[green]Loaded {summary.inserted} of {summary.received} counterparty trades[/green]"
+        f" ({summary.fuzzy_linked} fuzzy-matched)"
+    )
+
+@app.command()
+def stats():
+    """Show the server's connection pool metrics."""
+    s = _run(lambda c: c.get_server_stats())
+    table = Table(title=f"Server DB Pool (worker {s.worker_id})")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_row("Pool size", str(s.pool_size))
+    table.add_row("Checked out", str(s.pool_checked_out))
+    table.add_row("Checked in", str(s.pool_checked_in))
+    table.add_row("Overflow", str(s.pool_overflow))
+    table.add_row("Checkouts", str(s.pool_waits))
+    table.add_row("Avg wait (ms)", f"{s.pool_wait_avg_ms:.2f}")
+    table.add_row("Max wait (ms)", f"{s.pool_wait_max_ms:.2f}")
+    table.add_row("Ingest transactions", f"{s.ingest_rounds} for {s.ingest_chunks} chunks")
+    table.add_row("Read cache", f"{s.cache_hits} hits, {s.cache_misses} misses at version {s.data_version}")
+    if s.recon_queue_capacity:
+        table.add_row("Recon queue", f"{s.recon_queue_depth}/{s.recon_queue_capacity}")
+        table.add_row("Recon rounds", str(s.recon_rounds))
+        table.add_row("Recon batches", str(s.recon_batches))
+        table.add_row("Recon failures", f"{s.recon_failures} ({s.recon_dropped} trades dropped)")
+        table.add_row("Recon max lag (ms)", f"{s.recon_max_lag_ms:.2f}")
+    console.print(table)
+
 if __name__ == "__main__":
     app()
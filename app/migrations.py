@@ -0,0 +1,86 @@
+"""
+Idempotent DDL that brings databases created by older versions up to date.
+
+`metadata.create_all` only creates missing tables; it never adds columns,
+constraints or indexes to tables that already exist. Every statement here runs
+on each server start, so it must be safe to repeat. On very large tables
+create the indexes beforehand with CREATE INDEX CONCURRENTLY (same names) to
+avoid blocking writes; the IF NOT EXISTS statements then become no-ops.
+"""
+
+from sqlalchemy import text
+
+MIGRATIONS = [
+    # positions: running vwap numerator / denominator, backfilled once when the columns are added
+    # (older versions stored only the last batch's vwap, so that is recomputed too)
+    """DO $$ BEGIN
+         IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'positions' AND column_name = 'notional'
+                          AND table_schema = current_schema()) THEN
+           ALTER TABLE positions ADD COLUMN IF NOT EXISTS gross_qty NUMERIC NOT NULL DEFAULT 0;
+           ALTER TABLE positions ADD COLUMN notional NUMERIC NOT NULL DEFAULT 0;
+           UPDATE positions p SET gross_qty = c.gross_qty, notional = c.notional,
+                                  vwap = COALESCE(c.notional / NULLIF(c.gross_qty, 0), 0)
+           FROM (SELECT symbol, SUM(qty) AS gross_qty, SUM(price * qty) AS notional
+                 FROM trades GROUP BY symbol) c
+           WHERE p.symbol = c.symbol;
+         END IF;
+       END $$""",
+    # positions: trade count per symbol, backfilled once when the column is added
+    """DO $$ BEGIN
+         IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                        WHERE table_name = 'positions' AND column_name = 'trade_count'
+                          AND table_schema = current_schema()) THEN
+           ALTER TABLE positions ADD COLUMN trade_count BIGINT NOT NULL DEFAULT 0;
+           UPDATE positions p SET trade_count = c.n
+           FROM (SELECT symbol, count(*) AS n FROM trades GROUP BY symbol) c
+           WHERE p.symbol = c.symbol;
+         END IF;
+       END $$""",
+    # breaks used to be wiped and rebuilt; keep the newest row per trade, once, before making it unique
+    """DO $$ BEGIN
+         IF to_regclass('breaks_trade_id_key') IS NULL THEN
+           DELETE FROM breaks a USING breaks b
+           WHERE a.trade_id = b.trade_id AND a.break_id < b.break_id;
+           CREATE UNIQUE INDEX breaks_trade_id_key ON breaks(trade_id);
+         END IF;
+       END $$""",
+    # one counterparty confirmation per booked trade; makes loads idempotent via
+    # ON CONFLICT (trade_id, trade_ts), partitioned or not (a partitioned table
+    # needs trade_ts in the key anyway). Duplicates under the key are dropped
+    # (newest kept) only when the index is first created. Older versions keyed
+    # plain tables on trade_id alone; such rows are unique on both columns too,
+    # so that index is simply replaced.
+    """DO $$ BEGIN
+         IF to_regclass('counterparty_trades_trade_id_key') IS NULL THEN
+           DELETE FROM counterparty_trades a USING counterparty_trades b
+           WHERE a.trade_id = b.trade_id AND a.trade_ts = b.trade_ts AND a.id < b.id;
+           CREATE UNIQUE INDEX counterparty_trades_trade_id_key ON counterparty_trades(trade_id, trade_ts);
+         ELSIF NOT EXISTS (SELECT 1 FROM pg_index i
+                           JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                           WHERE i.indexrelid = 'counterparty_trades_trade_id_key'::regclass
+                             AND a.attname = 'trade_ts') THEN
+           ALTER TABLE counterparty_trades DROP CONSTRAINT IF EXISTS counterparty_trades_trade_id_key;
+           DROP INDEX IF EXISTS counterparty_trades_trade_id_key;
+           CREATE UNIQUE INDEX counterparty_trades_trade_id_key ON counterparty_trades(trade_id, trade_ts);
+         END IF;
+       END $$""",
+    "CREATE INDEX IF NOT EXISTS ix_trades_symbol ON trades(symbol)",
+    # client-supplied trade keys for idempotent ingest
+    "ALTER TABLE trades ADD COLUMN IF NOT EXISTS external_id TEXT",
+    "CREATE UNIQUE INDEX IF NOT EXISTS trades_external_id_key ON trades(external_id, trade_ts)",
+    # confidence of fuzzy trade_id links (NULL for exact ones)
+    "ALTER TABLE counterparty_trades ADD COLUMN IF NOT EXISTS match_confidence NUMERIC",
+    # trade_ts grows with insertion order, so a BRIN range index stays tiny and cheap to maintain
+    "CREATE INDEX IF NOT EXISTS ix_trades_trade_ts_brin ON trades USING brin(trade_ts)",
+    "CREATE INDEX IF NOT EXISTS ix_counterparty_trades_trade_ts_brin ON counterparty_trades USING brin(trade_ts)",
+    # keyset pagination of the dashboard tables (newest first)
+    "CREATE INDEX IF NOT EXISTS ix_trades_trade_ts_trade_id ON trades(trade_ts, trade_id)",
+    "CREATE INDEX IF NOT EXISTS ix_counterparty_trades_trade_ts_id ON counterparty_trades(trade_ts, id)",
+    # the single data_version row bumped by every change (app/service/changes.py)
+    "INSERT INTO data_version(id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING",
+]
+
+async def migrate(conn) -> None:
+    for ddl in MIGRATIONS:
+        await conn.execute(text(ddl))
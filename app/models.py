@@ -1,40 +1,73 @@
-from sqlalchemy import Column, Integer, Numeric, Text, TIMESTAMP, CheckConstraint
+from sqlalchemy import BigInteger, Column, Index, Integer, Numeric, Text, TIMESTAMP, CheckConstraint, UniqueConstraint
 from sqlalchemy.sql import func
 from app.db import Base
 
+# trades and counterparty_trades are range-partitioned by trade_ts (see app/partitions.py),
+# so their primary and unique keys have to include trade_ts. Check constraints are named
+# explicitly because ATTACH PARTITION matches them by name.
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        Index("ix_trades_trade_ts_brin", "trade_ts", postgresql_using="brin"),
+        # newest-first keyset pages on the dashboard
+        Index("ix_trades_trade_ts_trade_id", "trade_ts", "trade_id"),
+        # idempotent ingest: a client-supplied key is booked at most once
+        Index("trades_external_id_key", "external_id", "trade_ts", unique=True),
+        {"postgresql_partition_by": "RANGE (trade_ts)"},
+    )
 
     trade_id = Column(Integer, primary_key=True, autoincrement=True)
-    symbol   = Column(Text, nullable=False)
-    side     = Column(Text, CheckConstraint("side IN ('BUY','SELL')"), nullable=False)
+    symbol   = Column(Text, nullable=False, index=True)
+    side     = Column(Text, CheckConstraint("side IN ('BUY','SELL')", name="trades_side_check"), nullable=False)
     qty      = Column(Numeric, nullable=False)
     price    = Column(Numeric, nullable=False)
-    trade_ts = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    trade_ts = Column(TIMESTAMP(timezone=True), primary_key=True, server_default=func.now())
+    external_id = Column(Text)  # optional client key, see trades_external_id_key
 
 class CounterpartyTrade(Base):
     __tablename__ = "counterparty_trades"
+    __table_args__ = (
+        # at most one confirmation per booked trade (per partition day)
+        UniqueConstraint("trade_id", "trade_ts", name="counterparty_trades_trade_id_key"),
+        Index("ix_counterparty_trades_trade_ts_brin", "trade_ts", postgresql_using="brin"),
+        Index("ix_counterparty_trades_trade_ts_id", "trade_ts", "id"),
+        {"postgresql_partition_by": "RANGE (trade_ts)"},
+    )
 
     id       = Column(Integer, primary_key=True, autoincrement=True)
     trade_id = Column(Integer)
     symbol   = Column(Text, nullable=False)
-    side     = Column(Text, CheckConstraint("side IN ('BUY','SELL')"), nullable=False)
+    side     = Column(Text, CheckConstraint("side IN ('BUY','SELL')", name="counterparty_trades_side_check"), nullable=False)
     qty      = Column(Numeric, nullable=False)
     price    = Column(Numeric, nullable=False)
-    trade_ts = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    trade_ts = Column(TIMESTAMP(timezone=True), primary_key=True, server_default=func.now())
+    # set when trade_id was filled in by fuzzy matching (app/service/fuzzy.py); NULL for exact links
+    match_confidence = Column(Numeric)
 
 class Break(Base):
     __tablename__ = "breaks"
 
     break_id    = Column(Integer, primary_key=True, autoincrement=True)
-    trade_id    = Column(Integer)
+    trade_id    = Column(Integer, unique=True)  # one open break per trade, upserted in place
     reason      = Column(Text, nullable=False)
     detected_ts = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
 class Position(Base):
     __tablename__ = "positions"
 
-    symbol  = Column(Text, primary_key=True)
-    net_qty = Column(Numeric, nullable=False)
-    vwap    = Column(Numeric, nullable=False)
+    symbol    = Column(Text, primary_key=True)
+    net_qty   = Column(Numeric, nullable=False)
+    vwap      = Column(Numeric, nullable=False)
+    # running vwap numerator / denominator so batches can be folded in incrementally
+    gross_qty = Column(Numeric, nullable=False, server_default="0")
+    notional  = Column(Numeric, nullable=False, server_default="0")
+    # booked trades folded in; with notional it answers the dashboard totals without scanning trades
+    trade_count = Column(BigInteger, nullable=False, server_default="0")
+
+class DataVersion(Base):
+    """One row counting committed changes to the tables above; readers cache per version."""
+    __tablename__ = "data_version"
+
+    id      = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default="0")
 
@@ -0,0 +1,177 @@
+"""
+Daily range partitions for trades and counterparty_trades.
+
+Both tables are partitioned by trade_ts into UTC days named <table>_pYYYYMMDD,
+plus <table>_default which catches rows outside every created range.
+ensure_partitions() keeps today and the next PARTITION_DAYS_AHEAD days
+created; retire_partitions() detaches days older than the retention window and
+moves them to an archive schema or drops them, which is O(1) in the row count.
+partition_existing() converts heap tables created by older versions.
+"""
+
+import os
+import re
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import text
+
+PARTITIONED_TABLES = {"trades": "trade_id", "counterparty_trades": "id"}  # table -> serial column
+
+PARTITION_DAYS_AHEAD = int(os.getenv("PARTITION_DAYS_AHEAD", "7"))
+PARTITION_RETENTION_DAYS = int(os.getenv("PARTITION_RETENTION_DAYS", "0"))  # 0 keeps every day
+PARTITION_ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")  # empty: drop instead
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime.combine(day, time(), timezone.utc)
+
+def _parse_bound(value: str) -> datetime | None:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+async def _lock(conn) -> None:
+    # serialise partition DDL across server processes; released at commit
+    await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('recon.partitions'))"))
+    # pg_get_expr renders timestamptz bounds in the session time zone
+    await conn.execute(text("SET LOCAL TimeZone = 'UTC'"))
+
+async def is_partitioned(conn, table: str) -> bool:
+    kind = (await conn.execute(
+        text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}
+    )).scalar()
+    return kind == "p"
+
+async def partition_bounds(conn, table: str) -> list[tuple[str, datetime | None, datetime | None]]:
+    """(name, lower, upper) of every range partition; None stands for MINVALUE/MAXVALUE."""
+    rows = await conn.execute(text(
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:t)
+        """
+    ), {"t": table})
+    bounds = []
+    for name, bound in rows.all():
+        m = _BOUND_RE.search(bound)
+        if m:  # the DEFAULT partition has no range
+            bounds.append((name, _parse_bound(m[1]), _parse_bound(m[2])))
+    return bounds
+
+async def _create_day(conn, table: str, day: date) -> str:
+    name = f"{table}_p{day:%Y%m%d}"
+    lo, hi = _utc_midnight(day), _utc_midnight(day + timedelta(days=1))
+    await conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    # rows that landed in the default partition before this day existed move with it,
+    # otherwise ATTACH would reject the overlap
+    await conn.execute(text(
+        f'''WITH moved AS (DELETE FROM "{table}_default" WHERE trade_ts >= :lo AND trade_ts < :hi RETURNING *)
+            INSERT INTO "{name}" SELECT * FROM moved'''
+    ), {"lo": lo, "hi": hi})
+    await conn.execute(text(
+        f"""ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"""
+    ))
+    return name
+
+async def ensure_partitions(conn, days_ahead: int = PARTITION_DAYS_AHEAD, today: date | None = None) -> list[str]:
+    """Create the default partition and any missing day from today to today + days_ahead."""
+    today = today or datetime.now(timezone.utc).date()
+    await _lock(conn)
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not await is_partitioned(conn, table):
+            print(f"{table} is a plain table; run the server with --partition-existing to partition it")
+            continue
+        await conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'))
+        bounds = await partition_bounds(conn, table)
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            lo, hi = _utc_midnight(day), _utc_midnight(day + timedelta(days=1))
+            if any((b_lo is None or b_lo < hi) and (b_hi is None or lo < b_hi) for _, b_lo, b_hi in bounds):
+                continue
+            created.append(await _create_day(conn, table, day))
+    return created
+
+async def retire_partitions(
+    conn,
+    retention_days: int = PARTITION_RETENTION_DAYS,
+    archive_schema: str = PARTITION_ARCHIVE_SCHEMA,
+    today: date | None = None,
+) -> list[str]:
+    """Detach partitions entirely older than retention_days; archive or drop them."""
+    if retention_days <= 0:
+        return []
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = _utc_midnight(today - timedelta(days=retention_days))
+    await _lock(conn)
+    retired = []
+    for table in PARTITIONED_TABLES:
+        if not await is_partitioned(conn, table):
+            continue
+        for name, _, hi in await partition_bounds(conn, table):
+            if hi is None or hi > cutoff:
+                continue
+            await conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            if archive_schema:
+                await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+                await conn.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"'))
+            else:
+                await conn.execute(text(f'DROP TABLE "{name}"'))
+            retired.append(name)
+    return retired
+
+async def partition_existing(conn, metadata) -> list[str]:
+    """Turn heap tables from older versions into partitioned ones without copying rows.
+
+    The old table is renamed to <table>_legacy and attached as the partition
+    covering everything up to the day after its newest trade; new days get
+    regular daily partitions from there on.
+    """
+    await _lock(conn)
+    converted = []
+    for table, serial in PARTITIONED_TABLES.items():
+        if await is_partitioned(conn, table) or not (await conn.execute(
+            text("SELECT to_regclass(:t) IS NOT NULL"), {"t": table}
+        )).scalar():
+            continue
+        legacy = f"{table}_legacy"
+        await conn.execute(text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+        # index names are schema-wide; free them for the new parent
+        indexes = await conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {"t": legacy})
+        for (index,) in indexes.all():
+            await conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_legacy"'))
+        # a partition must carry the parent's NOT NULLs
+        for column in metadata.tables[table].columns:
+            if not column.nullable:
+                await conn.execute(text(f'ALTER TABLE "{legacy}" ALTER COLUMN "{column.name}" SET NOT NULL'))
+        # foreign keys from schema.sql cannot point into a partitioned table
+        fks = await conn.execute(text(
+            """SELECT conrelid::regclass::text, conname FROM pg_constraint
+               WHERE contype = 'f' AND (confrelid = to_regclass(:t) OR conrelid = to_regclass(:t))"""
+        ), {"t": legacy})
+        for owner, fk in fks.all():
+            await conn.execute(text(f'ALTER TABLE {owner} DROP CONSTRAINT "{fk}"'))
+        # the parent's keys include trade_ts; ATTACH builds the matching indexes on the partition
+        keys = await conn.execute(text(
+            "SELECT conname FROM pg_constraint WHERE contype IN ('p', 'u') AND conrelid = to_regclass(:t)"
+        ), {"t": legacy})
+        for (key,) in keys.all():
+            await conn.execute(text(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{key}"'))
+        await conn.run_sync(metadata.create_all, tables=[metadata.tables[table]])
+
+        newest = (await conn.execute(text(f'SELECT max(trade_ts) FROM "{legacy}"'))).scalar()
+        last_day = max(newest.astimezone(timezone.utc).date() if newest else date.min,
+                       datetime.now(timezone.utc).date())
+        cutover = _utc_midnight(last_day + timedelta(days=1))
+        await conn.execute(text(
+            f"""ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" FOR VALUES FROM (MINVALUE) TO ('{cutover.isoformat()}')"""
+        ))
+        # the parent got a fresh serial sequence; continue after the legacy IDs
+        await conn.execute(text(
+            f"""SELECT setval(pg_get_serial_sequence('{table}', '{serial}'),
+                              (SELECT COALESCE(max({serial}), 0) + 1 FROM "{legacy}"), false)"""
+        ))
+        converted.append(table)
+    return converted
@@ -0,0 +1,135 @@
+"""
+Bulk write paths for the ingest hot loop.
+
+Trade IDs are reserved from the serial sequence in a single round trip and the
+rows are then streamed in with asyncpg's binary COPY, so no ORM objects and no
+per-row INSERT ... RETURNING are involved.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+TRADE_COLUMNS = ["trade_id", "symbol", "side", "qty", "price", "trade_ts"]
+COUNTERPARTY_COLUMNS = ["trade_id", "symbol", "side", "qty", "price", "trade_ts"]
+
+class BookedTrade(NamedTuple):
+    """Plain-tuple stand-in for models.Trade once the row has been written."""
+    trade_id: int
+    symbol: str
+    side: str
+    qty: Decimal
+    price: Decimal
+    trade_ts: datetime
+
+async def _driver_connection(session: AsyncSession):
+    """The asyncpg connection behind the session, inside its open transaction."""
+    conn = await session.connection()
+    raw = (await conn.get_raw_connection()).driver_connection
+    if not raw.is_in_transaction():
+        # SQLAlchemy begins the server-side transaction lazily on first execute
+        await session.execute(text("SELECT 1"))
+    return raw
+
+def _num(v) -> Decimal:
+    # repr() keeps the shortest float form; Decimal(float) would store the full binary expansion
+    return v if isinstance(v, Decimal) else Decimal(repr(v))
+
+async def reserve_trade_ids(session: AsyncSession, n: int) -> list[int]:
+    sql = text("SELECT nextval(pg_get_serial_sequence('trades', 'trade_id')) FROM generate_series(1, :n)")
+    return list((await session.execute(sql, {"n": n})).scalars())
+
+async def copy_trades(session: AsyncSession, rows: list[tuple]) -> tuple[list[BookedTrade], list[int]]:
+    """Book (symbol, side, qty, price, trade_ts, external_id) rows.
+
+    Returns the newly booked trades and the trade_id of every input row in
+    order. Rows whose (external_id, trade_ts) is already booked, in the table
+    or earlier in `rows`, are skipped and report the existing trade_id. Batches
+    without any external_id go straight to COPY; keyed ones are staged and
+    moved with INSERT ... ON CONFLICT DO NOTHING.
+    """
+    if not rows:
+        return [], []
+    ids = await reserve_trade_ids(session, len(rows))
+    booked = [
+        BookedTrade(trade_id, symbol, side, _num(qty), _num(price), ts)
+        for trade_id, (symbol, side, qty, price, ts, _) in zip(ids, rows)
+    ]
+    conn = await _driver_connection(session)
+    if not any(r[5] for r in rows):
+        await conn.copy_records_to_table("trades", records=booked, columns=TRADE_COLUMNS)
+        return booked, ids
+
+    await conn.execute(
+        """CREATE TEMP TABLE IF NOT EXISTS trade_stage (
+               trade_id INT, symbol TEXT, side TEXT, qty NUMERIC, price NUMERIC, trade_ts TIMESTAMPTZ,
+               external_id TEXT
+           ) ON COMMIT DELETE ROWS"""
+    )
+    await conn.execute("TRUNCATE trade_stage")  # earlier chunks of the same transaction
+    cols = TRADE_COLUMNS + ["external_id"]
+    await conn.copy_records_to_table(
+        "trade_stage", records=[(*b, r[5]) for b, r in zip(booked, rows)], columns=cols
+    )
+    new_ids = {r["trade_id"] for r in await conn.fetch(
+        f"""INSERT INTO trades({", ".join(cols)})
+            SELECT {", ".join(cols)} FROM trade_stage ORDER BY trade_id
+            ON CONFLICT (external_id, trade_ts) DO NOTHING
+            RETURNING trade_id"""
+    )}
+    if len(new_ids) == len(rows):
+        return booked, ids
+    existing = {
+        (r["external_id"], r["trade_ts"]): r["trade_id"]
+        for r in await conn.fetch(
+            """SELECT t.trade_id, t.external_id, t.trade_ts
+               FROM trades t JOIN trade_stage s USING (external_id, trade_ts)"""
+        )
+    }
+    trade_ids = [b.trade_id if b.trade_id in new_ids else existing[(r[5], b.trade_ts)] for b, r in zip(booked, rows)]
+    return [b for b in booked if b.trade_id in new_ids], trade_ids
+
+async def copy_counterparty(session: AsyncSession, rows: Iterable[tuple]) -> int:
+    """COPY (trade_id, symbol, side, qty, price, trade_ts) rows into counterparty_trades."""
+    records = [
+        (trade_id, symbol, side, _num(qty), _num(price), ts)
+        for trade_id, symbol, side, qty, price, ts in rows
+    ]
+    if records:
+        conn = await _driver_connection(session)
+        await conn.copy_records_to_table("counterparty_trades", records=records, columns=COUNTERPARTY_COLUMNS)
+    return len(records)
+
+async def load_counterparty(session: AsyncSession, rows: list[tuple]) -> tuple[int, list[int]]:
+    """Insert counterparty file rows, skipping confirmations that are already stored.
+
+    Rows are COPYed into a temp staging table and moved over with
+    ON CONFLICT (trade_id, trade_ts) DO NOTHING, so reloading a file is
+    harmless for rows that carry a trade_id. Returns the number of rows
+    inserted and the distinct trade_ids among them.
+    """
+    if not rows:
+        return 0, []
+    conn = await _driver_connection(session)
+    await conn.execute(
+        """CREATE TEMP TABLE IF NOT EXISTS counterparty_stage (
+               trade_id INT, symbol TEXT, side TEXT, qty NUMERIC, price NUMERIC, trade_ts TIMESTAMPTZ
+           ) ON COMMIT DELETE ROWS"""
+    )
+    await conn.execute("TRUNCATE counterparty_stage")
+    records = [
+        (trade_id, symbol, side, _num(qty), _num(price), ts)
+        for trade_id, symbol, side, qty, price, ts in rows
+    ]
+    await conn.copy_records_to_table("counterparty_stage", records=records, columns=COUNTERPARTY_COLUMNS)
+    cols = ", ".join(COUNTERPARTY_COLUMNS)
+    inserted = await conn.fetch(
+        f"""INSERT INTO counterparty_trades({cols})
+            SELECT {cols} FROM counterparty_stage
+            ON CONFLICT (trade_id, trade_ts) DO NOTHING
+            RETURNING trade_id"""
+    )
+    return len(inserted), sorted({r["trade_id"] for r in inserted if r["trade_id"] is not None})
@@ -0,0 +1,148 @@
+"""
+Change tracking: the data version and the live feed behind WatchChanges.
+
+Transactions that change the dashboard's tables call `record`. It bumps the
+single data_version row, which readers use to tell whether anything they
+cached may be stale (see app/cache.py), and sends a small JSON notice with
+pg_notify. Postgres delivers it only when the transaction commits, and to
+every server process, so one feed covers ingest from all workers, async recon
+and cron jobs. A notice names rows, at most WATCH_MAX_ROWS of each kind:
+
+    {"trades": [ids], "ts": [lo, hi], "breaks": [trade ids], "symbols": [...],
+     "refresh": ["breaks", ...]}
+
+"refresh" marks tables that changed in bulk (sweeps, rebuilds, file loads);
+watchers reload those instead of receiving rows.
+
+Each server process holds one LISTEN connection while anybody is watching. It
+loads the named rows once per notice and fans the result out to the
+subscribers. A subscriber that falls WATCH_QUEUE_SIZE messages behind, or
+misses notices while the connection is re-established, gets a refresh of
+every table instead.
+"""
+
+import asyncio
+import json
+import os
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CHANNEL = "recon_changes"
+TABLES = ("trades", "counterparty", "breaks", "positions")
+CHANGE_NOTIFY = os.getenv("CHANGE_NOTIFY", "true").lower() not in ("0", "false", "no")
+WATCH_MAX_ROWS = int(os.getenv("WATCH_MAX_ROWS", "50"))      # per kind and notice
+WATCH_QUEUE_SIZE = int(os.getenv("WATCH_QUEUE_SIZE", "100"))  # messages per subscriber
+
+def notice(**change) -> str:
+    """Payload for pg_notify; row lists are cut to the newest WATCH_MAX_ROWS."""
+    body = {}
+    for key, value in change.items():
+        if not value:
+            continue
+        if key in ("trades", "breaks"):
+            value = sorted(value)[-WATCH_MAX_ROWS:]
+        elif key == "symbols" and len(value) > WATCH_MAX_ROWS:
+            body.setdefault("refresh", []).append("positions")
+            continue
+        elif key == "refresh":
+            value = sorted(set(value) | set(body.get("refresh", ())))
+        else:
+            value = list(value)
+        body[key] = value
+    return json.dumps(body, default=str)
+
+_BUMP_SQL = text("UPDATE data_version SET version = version + 1 WHERE id = 1")
+_BUMP_AND_NOTIFY_SQL = text(
+    """WITH v AS (UPDATE data_version SET version = version + 1 WHERE id = 1 RETURNING 1)
+       SELECT pg_notify(:channel, :payload) FROM v"""
+)
+
+async def record(session: AsyncSession, **change) -> None:
+    """Record this transaction's changes (keywords as for `notice`); visible to others once it commits.
+
+    The version row is updated last thing before commit, so concurrent writers
+    queue on it only for the commit itself.
+    """
+    payload = notice(**change)
+    if payload == "{}":
+        return
+    if CHANGE_NOTIFY:
+        await session.execute(_BUMP_AND_NOTIFY_SQL, {"channel": CHANNEL, "payload": payload})
+    else:
+        await session.execute(_BUMP_SQL)
+
+async def data_version(session: AsyncSession) -> int:
+    return (await session.execute(text("SELECT version FROM data_version WHERE id = 1"))).scalar_one()
+
+class ChangeFeed:
+    def __init__(self, dsn: str, load):
+        """load(notice: dict) -> message is awaited once per notice, then sent to every subscriber."""
+        self.dsn = dsn
+        self.load = load
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+
+    async def subscribe(self):
+        """Yield messages until the caller stops iterating."""
+        queue: asyncio.Queue = asyncio.Queue(WATCH_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _publish(self, change: dict) -> None:
+        if not self._subscribers:
+            return
+        message = await self.load(change)
+        for queue in list(self._subscribers):
+            if queue.full():  # too far behind to follow row by row; make it reload everything
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(await self.load({"refresh": list(TABLES)}))
+            else:
+                queue.put_nowait(message)
+
+    async def _listen(self) -> None:
+        """Hold the LISTEN connection while there are subscribers, reconnecting after errors."""
+        notices: asyncio.Queue = asyncio.Queue()
+        reconnecting = False
+        while self._subscribers:
+            try:
+                conn = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError) as exc:
+                print(f"change feed: cannot connect ({exc!r}); retrying")
+                await asyncio.sleep(1)
+                reconnecting = True
+                continue
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _: lost.set())
+            await conn.add_listener(CHANNEL, lambda _c, _pid, _ch, payload: notices.put_nowait(payload))
+            try:
+                if reconnecting:  # notices sent while we were away are gone
+                    await self._publish({"refresh": list(TABLES)})
+                while self._subscribers and not lost.is_set():
+                    try:
+                        payload = await asyncio.wait_for(notices.get(), timeout=1)
+                    except asyncio.TimeoutError:
+                        continue
+                    try:
+                        await self._publish(json.loads(payload))
+                    except Exception as exc:  # a bad notice or failed load must not end the feed
+                        print(f"change feed: dropped notice {payload[:200]!r}: {exc!r}")
+            except (OSError, asyncpg.PostgresError) as exc:
+                print(f"change feed: connection lost ({exc!r}); reconnecting")
+            finally:
+                reconnecting = True
+                if not conn.is_closed():
+                    await conn.close()
@@ -1,7 +1,25 @@
-import os, pathlib, sys, grpc
+import asyncio, itertools, os, pathlib, sys, uuid, grpc
 from grpc_tools import protoc
 
+from app.service import codec
+
 GRPC_TARGET = os.getenv("GRPC_SERVER", "localhost:50051")
+# channels (TCP connections) per client, used round-robin
+GRPC_POOL_SIZE = int(os.getenv("GRPC_POOL_SIZE", "1"))
+
+CHANNEL_OPTIONS = [
+    # a private subchannel pool per channel, otherwise identical channels share one connection
+    ("grpc.use_local_subchannel_pool", 1),
+    ("grpc.keepalive_time_ms", int(os.getenv("GRPC_KEEPALIVE_MS", "30000"))),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    # match the server's max_send_mb; gRPC's 4 MB default is too small for Get* on big tables
+    ("grpc.max_receive_message_length", int(os.getenv("GRPC_MAX_RECEIVE_MB", "64")) * 1024 * 1024),
+]
+
+# stream failures after which unacknowledged batches are worth re-sending
+RETRYABLE_CODES = {grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED, grpc.StatusCode.ABORTED}
 
 PROTO_PATH = pathlib.Path(__file__).parent.parent.parent / "proto"
 GENERATED_PATH = PROTO_PATH / "generated"
@@ -20,23 +38,217 @@ sys.path.append(str(GENERATED_PATH))
 import reconcile_pb2 as pb2
 import reconcile_pb2_grpc as pb2_grpc
 
-async def ingest_trades(trades):
-    async with grpc.aio.insecure_channel(GRPC_TARGET) as channel:
-        stub = pb2_grpc.ReconcileServiceStub(channel)
+class ReconcileClient:
+    """Long-lived ReconcileService client.
+
+    Channels are created lazily on first use and reused for every call, so
+    repeated calls skip the TCP + HTTP/2 handshake. With pool_size > 1 calls
+    are spread round-robin over that many connections. grpc.aio channels are
+    bound to the event loop that created them, so a new loop gets fresh ones.
+    """
+
+    def __init__(self, target: str = GRPC_TARGET, pool_size: int = GRPC_POOL_SIZE, options=CHANNEL_OPTIONS):
+        self.target = target
+        self.pool_size = max(1, pool_size)
+        self.options = options
+        self._channels: list = []
+        self._stubs: list = []
+        self._loop = None
+        self._rr = itertools.count()
+
+    def _stub(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._channels = [
+                grpc.aio.insecure_channel(self.target, options=self.options) for _ in range(self.pool_size)
+            ]
+            self._stubs = [pb2_grpc.ReconcileServiceStub(c) for c in self._channels]
+            self._loop = loop
+        return self._stubs[next(self._rr) % self.pool_size]
+
+    async def close(self, grace: float | None = None):
+        """Close all channels, letting in-flight RPCs finish for up to `grace` seconds."""
+        channels, self._channels, self._stubs, self._loop = self._channels, [], [], None
+        await asyncio.gather(*(c.close(grace) for c in channels))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def ingest_trades(self, trades):
         async def generator():
             for t in trades:
                 yield pb2.Trade(**t)
-        resp = await stub.IngestTrades(generator())
+        resp = await self._stub().IngestTrades(generator())
         return resp.inserted
 
-async def get_positions():
-    async with grpc.aio.insecure_channel(GRPC_TARGET) as channel:
-        stub = pb2_grpc.ReconcileServiceStub(channel)
-        res = await stub.GetPositions(pb2.Empty())
+    async def ingest_trades_stream(self, trades, batch_size: int = 500, max_retries: int = 3,
+                                   key_trades: bool = False):
+        """Pipeline trades through IngestTradesStream; returns the IngestAcks in arrival order.
+
+        Batches are sent without waiting for earlier acks. If the stream breaks,
+        the batches that were never acknowledged are re-sent on a new stream,
+        provided every trade in them has an external_id: a batch may have been
+        committed although its ack was lost, and only keyed trades are skipped
+        as duplicates. Otherwise the error is raised. key_trades=True gives
+        trades without an external_id a random one first, so every batch can
+        be re-sent, at the cost of the server's slower staged insert instead
+        of a plain COPY.
+        """
+        if key_trades:
+            trades = [t if t.get("external_id") else {**t, "external_id": uuid.uuid4().hex} for t in trades]
+        pending = {
+            seq: trades[start:start + batch_size]
+            for seq, start in enumerate(range(0, len(trades), batch_size))
+        }
+        unkeyed = {seq for seq, batch in pending.items() if not all(t.get("external_id") for t in batch)}
+        acks = []
+        for attempt in range(max_retries + 1):
+            try:
+                async def generator():
+                    for seq in list(pending):
+                        yield pb2.TradeBatch(batch_seq=seq, **codec.columnar_fields(pending[seq]))
+                async for ack in self._stub().IngestTradesStream(generator()):
+                    pending.pop(ack.batch_seq, None)
+                    acks.append(ack)
+                return acks
+            except grpc.aio.AioRpcError as exc:
+                if exc.code() not in RETRYABLE_CODES or attempt == max_retries or unkeyed & pending.keys():
+                    raise
+        return acks
+
+    async def get_positions(self):
+        res = await self._stub().GetPositions(pb2.Empty())
         return res.items
 
-async def get_breaks():
-    async with grpc.aio.insecure_channel(GRPC_TARGET) as channel:
-        stub = pb2_grpc.ReconcileServiceStub(channel)
-        res = await stub.GetBreaks(pb2.Empty())
+    async def get_breaks(self):
+        res = await self._stub().GetBreaks(pb2.Empty())
         return res.items
+
+    async def list_breaks(self, page_size: int = 0, page_token: str = "", **filters):
+        """One BreakPage; filters are BreakQuery fields (symbol, reason, since, until)."""
+        return await self._stub().ListBreaks(pb2.BreakQuery(page_size=page_size, page_token=page_token, **filters))
+
+    async def stream_breaks(self, **filters):
+        async for b in self._stub().StreamBreaks(pb2.BreakQuery(**filters)):
+            yield b
+
+    async def list_positions(self, page_size: int = 0, page_token: str = "", **filters):
+        return await self._stub().ListPositions(pb2.PositionQuery(page_size=page_size, page_token=page_token, **filters))
+
+    async def stream_positions(self, **filters):
+        async for p in self._stub().StreamPositions(pb2.PositionQuery(**filters)):
+            yield p
+
+    async def list_trades(self, page_size: int = 0, page_token: str = "", **filters):
+        """One TradePage, newest first; filters are TradeQuery fields (symbol, side)."""
+        return await self._stub().ListTrades(pb2.TradeQuery(page_size=page_size, page_token=page_token, **filters))
+
+    async def list_counterparty(self, page_size: int = 0, page_token: str = "", **filters):
+        return await self._stub().ListCounterparty(
+            pb2.TradeQuery(page_size=page_size, page_token=page_token, **filters)
+        )
+
+    async def get_summary(self):
+        return await self._stub().GetSummary(pb2.Empty())
+
+    async def get_data_version(self) -> int:
+        return (await self._stub().GetDataVersion(pb2.Empty())).version
+
+    async def clear_all(self):
+        await self._stub().ClearAll(pb2.Empty())
+
+    async def load_counterparty(self, chunks):
+        """Stream (trade_id, symbol, side, qty, price, trade_ts) row chunks to LoadCounterparty.
+
+        `chunks` may be a plain iterator such as feeds.read_chunks(); it is
+        advanced in a worker thread so file parsing overlaps with sending.
+        """
+        it = iter(chunks)
+        error = None
+        async def generator():
+            nonlocal error
+            try:
+                while (chunk := await asyncio.to_thread(next, it, None)) is not None:
+                    yield pb2.CounterpartyBatch(**codec.counterparty_fields(chunk))
+            except Exception as exc:  # a parse error must not end the upload as if the file were complete
+                error = exc
+                call.cancel()
+        call = self._stub().LoadCounterparty(generator())
+        try:
+            return await call
+        except asyncio.CancelledError:
+            if error is not None:
+                raise error from None
+            raise
+
+    async def get_server_stats(self):
+        return await self._stub().GetServerStats(pb2.Empty())
+
+    async def watch_changes(self):
+        """Committed changes as they happen; iterate for as long as you want them."""
+        call = self._stub().WatchChanges(pb2.Empty())
+        try:
+            async for change in call:
+                yield change
+        finally:
+            call.cancel()  # the server drops the subscription
+
+# ------------------- module-level helpers on a shared client -------------------
+_default = ReconcileClient()
+
+def default_client() -> ReconcileClient:
+    return _default
+
+async def close(grace: float | None = None):
+    await _default.close(grace)
+
+async def ingest_trades(trades):
+    return await _default.ingest_trades(trades)
+
+async def ingest_trades_stream(trades, batch_size: int = 500, max_retries: int = 3, key_trades: bool = False):
+    return await _default.ingest_trades_stream(trades, batch_size, max_retries, key_trades)
+
+async def get_positions():
+    return await _default.get_positions()
+
+async def get_breaks():
+    return await _default.get_breaks()
+
+async def list_breaks(page_size: int = 0, page_token: str = "", **filters):
+    return await _default.list_breaks(page_size, page_token, **filters)
+
+def stream_breaks(**filters):
+    return _default.stream_breaks(**filters)
+
+async def list_positions(page_size: int = 0, page_token: str = "", **filters):
+    return await _default.list_positions(page_size, page_token, **filters)
+
+def stream_positions(**filters):
+    return _default.stream_positions(**filters)
+
+async def list_trades(page_size: int = 0, page_token: str = "", **filters):
+    return await _default.list_trades(page_size, page_token, **filters)
+
+async def list_counterparty(page_size: int = 0, page_token: str = "", **filters):
+    return await _default.list_counterparty(page_size, page_token, **filters)
+
+async def get_summary():
+    return await _default.get_summary()
+
+async def get_data_version() -> int:
+    return await _default.get_data_version()
+
+async def clear_all():
+    await _default.clear_all()
+
+async def load_counterparty(chunks):
+    return await _default.load_counterparty(chunks)
+
+async def get_server_stats():
+    return await _default.get_server_stats()
+
+def watch_changes():
+    return _default.watch_changes()
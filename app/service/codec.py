@@ -0,0 +1,108 @@
+"""
+Columnar TradeBatch encoding.
+
+Trades are shipped as packed columns (symbol dictionary indexes, side enum,
+qty/price doubles, epoch-nanosecond timestamps) instead of one Trade message
+with an ISO string each, and decoded back into rows for bulk.copy_trades.
+CounterpartyBatch uses the same layout plus a trade_id column.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+# Side enum values in reconcile.proto
+SIDES = {"BUY": 1, "SELL": 2}
+SIDE_NAMES = {v: k for k, v in SIDES.items()}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def parse_ts(ts) -> datetime:
+    """ISO string or datetime → aware datetime; naive values are taken as UTC.
+
+    Booked timestamps must all be aware: Postgres returns timestamptz values
+    that way, and naive and aware datetimes cannot be compared.
+    """
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+def to_epoch_ns(ts) -> int:
+    """ISO string or datetime → UTC epoch nanoseconds (naive datetimes are taken as UTC)."""
+    delta = parse_ts(ts) - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+
+def from_epoch_ns(ns: int) -> datetime:
+    # timestamptz only keeps microseconds, so truncating the nanoseconds is lossless for storage
+    return _EPOCH + timedelta(microseconds=ns // 1_000)
+
+def columnar_fields(trades: list[dict]) -> dict:
+    """TradeBatch keyword arguments for trades shaped like generator.random_trade()."""
+    symbols: dict[str, int] = {}
+    symbol_idx = [symbols.setdefault(t["symbol"], len(symbols)) for t in trades]
+    fields = {
+        "symbols": list(symbols),
+        "symbol_idx": symbol_idx,
+        "side": [SIDES[t["side"]] for t in trades],
+        "qty": [t["qty"] for t in trades],
+        "price": [t["price"] for t in trades],
+        "trade_ts_ns": [to_epoch_ns(t["trade_ts"]) for t in trades],
+    }
+    if any(t.get("external_id") for t in trades):
+        fields["external_id"] = [t.get("external_id") or "" for t in trades]
+    return fields
+
+def decode_batch(batch) -> list[tuple]:
+    """TradeBatch → (symbol, side, qty, price, trade_ts, external_id) rows; external_id may be None.
+
+    Row-form batches (`trades` populated) are still accepted. Raises ValueError
+    on ragged columns, unknown sides or out-of-range symbol indexes.
+    """
+    if batch.trades:
+        return [
+            (t.symbol, t.side, t.qty, t.price, parse_ts(t.trade_ts), t.external_id or None)
+            for t in batch.trades
+        ]
+    n = len(batch.symbol_idx)
+    if not (len(batch.side) == len(batch.qty) == len(batch.price) == len(batch.trade_ts_ns) == n):
+        raise ValueError("TradeBatch columns have different lengths")
+    if len(batch.external_id) not in (0, n):
+        raise ValueError("TradeBatch external_id must be empty or have one entry per trade")
+    try:
+        symbols = [batch.symbols[i] for i in batch.symbol_idx]
+        sides = [SIDE_NAMES[s] for s in batch.side]
+    except (IndexError, KeyError) as exc:
+        raise ValueError(f"invalid TradeBatch column value: {exc}") from None
+    ts = [from_epoch_ns(ns) for ns in batch.trade_ts_ns]
+    external_ids = [e or None for e in batch.external_id] or [None] * n
+    return list(zip(symbols, sides, batch.qty, batch.price, ts, external_ids))
+
+def counterparty_fields(rows: list[tuple]) -> dict:
+    """CounterpartyBatch keyword arguments for (trade_id, symbol, side, qty, price, trade_ts) rows.
+
+    A trade_id of None is sent as 0.
+    """
+    symbols: dict[str, int] = {}
+    symbol_idx = [symbols.setdefault(r[1], len(symbols)) for r in rows]
+    return {
+        "trade_id": [r[0] or 0 for r in rows],
+        "symbols": list(symbols),
+        "symbol_idx": symbol_idx,
+        "side": [SIDES[r[2]] for r in rows],
+        "qty": [r[3] for r in rows],
+        "price": [r[4] for r in rows],
+        "trade_ts_ns": [to_epoch_ns(r[5]) for r in rows],
+    }
+
+def decode_counterparty(batch) -> list[tuple]:
+    """CounterpartyBatch → (trade_id, symbol, side, qty, price, trade_ts) rows; raises ValueError like decode_batch."""
+    n = len(batch.trade_id)
+    if not (len(batch.symbol_idx) == len(batch.side) == len(batch.qty) == len(batch.price)
+            == len(batch.trade_ts_ns) == n):
+        raise ValueError("CounterpartyBatch columns have different lengths")
+    try:
+        symbols = [batch.symbols[i] for i in batch.symbol_idx]
+        sides = [SIDE_NAMES[s] for s in batch.side]
+    except (IndexError, KeyError) as exc:
+        raise ValueError(f"invalid CounterpartyBatch column value: {exc}") from None
+    trade_ids = [t or None for t in batch.trade_id]
+    ts = [from_epoch_ns(ns) for ns in batch.trade_ts_ns]
+    return list(zip(trade_ids, symbols, sides, batch.qty, batch.price, ts))
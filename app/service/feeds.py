@@ -0,0 +1,105 @@
+"""
+Streaming parsers for counterparty files (custodian CSV, FIX drop copy).
+
+Files are read line by line and yielded in fixed-size chunks of
+(trade_id, symbol, side, qty, price, trade_ts) rows, so memory stays bounded
+by the chunk size whatever the file size. trade_id is None when the file does
+not carry our ID. `.gz` files are decompressed on the fly.
+
+CSV needs a header with symbol, side, qty, price and trade_ts (ISO-8601;
+naive times are UTC), plus an optional trade_id column. FIX files hold one
+message per line with SOH or '|' separated tags. Only execution reports
+(35=8) that are fills are used: 55 symbol, 54 side, 32/38 quantity, 31/44
+price, 60 TransactTime, and 11 ClOrdID as trade_id when it is numeric.
+"""
+
+import csv
+import gzip
+import io
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+FORMATS = ("csv", "fix")
+
+_SIDES = {"BUY": "BUY", "B": "BUY", "1": "BUY", "SELL": "SELL", "S": "SELL", "2": "SELL"}
+_FILL_EXEC_TYPES = {"F", "1", "2"}  # trade, and pre-FIX 4.4 partial fill / fill
+
+def _side(value: str) -> str:
+    try:
+        return _SIDES[value.strip().upper()]
+    except KeyError:
+        raise ValueError(f"unknown side {value!r}") from None
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+def _open(path) -> io.TextIOBase:
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", newline="")
+    return open(path, newline="")
+
+def detect_format(path) -> str:
+    name = Path(path).name.lower().removesuffix(".gz")
+    return "fix" if name.endswith((".fix", ".log")) else "csv"
+
+# ------------------- CSV -------------------
+def parse_csv(lines):
+    reader = csv.DictReader(lines)
+    missing = {"symbol", "side", "qty", "price", "trade_ts"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"CSV header is missing {sorted(missing)}")
+    has_id = "trade_id" in reader.fieldnames
+    for row in reader:
+        try:
+            trade_id = int(row["trade_id"]) if has_id and row["trade_id"] else None
+            yield (
+                trade_id,
+                row["symbol"].strip(),
+                _side(row["side"]),
+                float(row["qty"]),
+                float(row["price"]),
+                _utc(datetime.fromisoformat(row["trade_ts"].strip())),
+            )
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"line {reader.line_num}: {exc}") from None
+
+# ------------------- FIX -------------------
+def _fix_time(value: str) -> datetime:
+    fmt = "%Y%m%d-%H:%M:%S.%f" if "." in value else "%Y%m%d-%H:%M:%S"
+    return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+
+def parse_fix(lines):
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        sep = "\x01" if "\x01" in line else "|"
+        tags = dict(field.split("=", 1) for field in line.split(sep) if "=" in field)
+        if tags.get("35") != "8" or tags.get("150", "F") not in _FILL_EXEC_TYPES:
+            continue
+        try:
+            cl_ord_id = tags.get("11", "")
+            yield (
+                int(cl_ord_id) if cl_ord_id.isdigit() else None,
+                tags["55"],
+                _side(tags["54"]),
+                float(tags.get("32") or tags["38"]),
+                float(tags.get("31") or tags["44"]),
+                _fix_time(tags["60"]),
+            )
+        except (KeyError, ValueError) as exc:
+            raise ValueError(f"line {line_no}: bad execution report ({exc!r})") from None
+
+# ------------------- chunking -------------------
+def read_chunks(path, fmt: str = "", chunk_size: int = 5000):
+    """Yield lists of at most chunk_size normalized rows from a counterparty file."""
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown counterparty file format {fmt!r}; expected one of {FORMATS}")
+    parse = parse_fix if fmt == "fix" else parse_csv
+    with _open(path) as f:
+        rows = parse(f)
+        while chunk := list(islice(rows, chunk_size)):
+            yield chunk
@@ -0,0 +1,129 @@
+"""
+Fuzzy linking of counterparty trades that arrive without our trade_id.
+
+Unconfirmed booked trades are bucketed by (symbol, side, UTC trade date) and
+sorted by trade_ts. Each unlinked counterparty row bisects its bucket for the
+trades inside the timestamp tolerance, so candidate search is O(log n) per row
+instead of a nested scan. Candidates outside the price tolerance are dropped,
+the rest are scored, and pairs are assigned greedily by descending confidence
+so every trade and every counterparty row is used at most once.
+
+Linked rows get trade_id and match_confidence set; exact (ID-carrying)
+confirmations keep match_confidence NULL.
+"""
+
+import bisect
+import os
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+FUZZY_TS_TOLERANCE = float(os.getenv("FUZZY_TS_TOLERANCE", "60"))          # seconds
+FUZZY_PRICE_TOLERANCE = float(os.getenv("FUZZY_PRICE_TOLERANCE", "0.001"))  # relative to booked price
+FUZZY_MIN_CONFIDENCE = float(os.getenv("FUZZY_MIN_CONFIDENCE", "0.5"))
+
+# weights of the confidence score; each term is 1 for a perfect match
+_W_TS, _W_PRICE, _W_QTY = 0.4, 0.4, 0.2
+
+class Link(NamedTuple):
+    cp_id: int
+    trade_id: int
+    trade_ts: datetime  # of the booked trade
+    confidence: float
+
+def confidence(dt: float, ts_tol: float, price_diff: float, price_tol: float, qty_diff: float) -> float:
+    """Score in [0, 1] from the relative timestamp, price and quantity differences."""
+    ts_score = 1 - dt / ts_tol if ts_tol else 1.0
+    price_score = 1 - price_diff / price_tol if price_tol else 1.0
+    return _W_TS * ts_score + _W_PRICE * price_score + _W_QTY * max(0.0, 1 - qty_diff)
+
+def _bucket_days(ts: datetime, ts_tol: float):
+    lo, hi = (ts - timedelta(seconds=ts_tol)).date(), (ts + timedelta(seconds=ts_tol)).date()
+    return (lo,) if lo == hi else (lo, hi)
+
+def match(
+    booked,
+    counterparty,
+    ts_tol: float = FUZZY_TS_TOLERANCE,
+    price_tol: float = FUZZY_PRICE_TOLERANCE,
+    min_confidence: float = FUZZY_MIN_CONFIDENCE,
+) -> list[Link]:
+    """Link counterparty rows to booked trades.
+
+    booked: (trade_id, symbol, side, qty, price, trade_ts) rows still unconfirmed.
+    counterparty: (id, symbol, side, qty, price, trade_ts) rows without trade_id.
+    Timestamps must be timezone-aware; dates are bucketed in that zone (UTC from Postgres).
+    """
+    buckets: dict[tuple, tuple[list, list]] = {}
+    for row in sorted(booked, key=lambda r: r[5]):
+        stamps, rows = buckets.setdefault((row[1], row[2], row[5].date()), ([], []))
+        stamps.append(row[5].timestamp())
+        rows.append(row)
+
+    candidates = []
+    for cp_id, symbol, side, qty, price, ts in counterparty:
+        at = ts.timestamp()
+        for day in _bucket_days(ts, ts_tol):
+            bucket = buckets.get((symbol, side, day))
+            if not bucket:
+                continue
+            stamps, rows = bucket
+            lo = bisect.bisect_left(stamps, at - ts_tol)
+            hi = bisect.bisect_right(stamps, at + ts_tol)
+            for i in range(lo, hi):
+                trade_id, _, _, t_qty, t_price, _ = rows[i]
+                price_diff = abs(float(price) - float(t_price)) / abs(float(t_price)) if t_price else 0.0
+                if price_diff > price_tol:
+                    continue
+                qty_diff = abs(float(qty) - float(t_qty)) / abs(float(t_qty)) if t_qty else 0.0
+                score = confidence(abs(at - stamps[i]), ts_tol, price_diff, price_tol, qty_diff)
+                if score >= min_confidence:
+                    candidates.append((score, cp_id, trade_id, rows[i][5]))
+
+    links, used_cp, used_trades = [], set(), set()
+    for score, cp_id, trade_id, trade_ts in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        if cp_id in used_cp or trade_id in used_trades:
+            continue
+        used_cp.add(cp_id)
+        used_trades.add(trade_id)
+        links.append(Link(cp_id, trade_id, trade_ts, round(score, 4)))
+    return links
+
+# ------------------- database side -------------------
+async def link_unmatched(
+    session: AsyncSession,
+    since: datetime | None = None,
+    ts_tol: float = FUZZY_TS_TOLERANCE,
+    price_tol: float = FUZZY_PRICE_TOLERANCE,
+    min_confidence: float = FUZZY_MIN_CONFIDENCE,
+) -> list[Link]:
+    """Fuzzy-link counterparty rows without trade_id (from `since` on) and store the links."""
+    cp_rows = (await session.execute(text(
+        """SELECT id, symbol, side, qty, price, trade_ts FROM counterparty_trades
+           WHERE trade_id IS NULL AND (CAST(:since AS timestamptz) IS NULL OR trade_ts >= :since)"""
+    ), {"since": since})).all()
+    if not cp_rows:
+        return []
+    pad = timedelta(seconds=ts_tol)
+    booked = (await session.execute(text(
+        """SELECT t.trade_id, t.symbol, t.side, t.qty, t.price, t.trade_ts FROM trades t
+           WHERE t.trade_ts BETWEEN :lo AND :hi
+             AND NOT EXISTS (SELECT 1 FROM counterparty_trades cp WHERE cp.trade_id = t.trade_id)"""
+    ), {"lo": min(r.trade_ts for r in cp_rows) - pad, "hi": max(r.trade_ts for r in cp_rows) + pad})).all()
+
+    links = match(booked, cp_rows, ts_tol, price_tol, min_confidence)
+    if links:
+        await session.execute(text(
+            """UPDATE counterparty_trades cp
+               SET trade_id = l.trade_id, match_confidence = round(l.confidence::numeric, 4)
+               FROM unnest(CAST(:cp_ids AS int[]), CAST(:trade_ids AS int[]), CAST(:scores AS float8[]))
+                    AS l(cp_id, trade_id, confidence)
+               WHERE cp.id = l.cp_id"""
+        ), {
+            "cp_ids": [l.cp_id for l in links],
+            "trade_ids": [l.trade_id for l in links],
+            "scores": [l.confidence for l in links],
+        })
+    return links
@@ -0,0 +1,135 @@
+"""
+Reconciliation pipeline that runs behind ingest.
+
+In async recon mode an ingest chunk is booked and committed, then only its
+trade IDs and trade_ts range are queued here, and the RPC acknowledges it
+right away. Worker tasks take whatever is queued, up to `coalesce` trades, and
+fold it into positions and breaks in one transaction. Under load that means
+one recalc per several ingest batches.
+
+The queue is bounded. When it is full, `submit` waits, so a recon backlog
+pushes back on ingest instead of growing without limit. A round that fails is
+rolled back and retried by the same worker after `retry_delay`, doubling each
+time, up to `retries` times; while it waits, the queue keeps filling and
+eventually holds ingest back too. Work is lost only after the last retry or if
+the process dies. `--full-rebuild` and `--sweep-breaks` repair positions and
+breaks afterwards.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, NamedTuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+class Job(NamedTuple):
+    trade_ids: list[int]
+    ts_lo: datetime
+    ts_hi: datetime
+    queued_at: float  # time.monotonic()
+
+class ReconPipeline:
+    def __init__(
+        self,
+        handler: Callable[[AsyncSession, list[int], tuple[datetime, datetime]], Awaitable],
+        session_factory,
+        workers: int = 2,
+        max_depth: int = 100,
+        coalesce: int = 20000,
+        retries: int = 5,
+        retry_delay: float = 0.5,
+    ):
+        """handler(session, trade_ids, ts_range) reconciles trades; the pipeline commits."""
+        self.handler = handler
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.coalesce = max(1, coalesce)
+        self.retries = max(0, retries)
+        self.retry_delay = retry_delay
+        self.queue: asyncio.Queue[Job] = asyncio.Queue(max(1, max_depth))
+        self._tasks: list[asyncio.Task] = []
+        # metrics
+        self.rounds = 0       # recon transactions run
+        self.jobs = 0         # ingest batches reconciled
+        self.trades = 0
+        self.failures = 0     # rounds that raised and were rolled back
+        self.dropped = 0      # trades given up after the last retry; left to the repair jobs
+        self.max_lag = 0.0    # seconds from submit to commit
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Finish the queued work, then stop the workers."""
+        await self.drain()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain(self) -> None:
+        await self.queue.join()
+
+    async def submit(self, trade_ids: list[int], ts_range: tuple[datetime, datetime]) -> None:
+        if trade_ids:
+            await self.queue.put(Job(trade_ids, ts_range[0], ts_range[1], time.monotonic()))
+
+    def _take(self, first: Job) -> list[Job]:
+        jobs, size = [first], len(first.trade_ids)
+        while size < self.coalesce and not self.queue.empty():
+            job = self.queue.get_nowait()
+            jobs.append(job)
+            size += len(job.trade_ids)
+        return jobs
+
+    async def _work(self) -> None:
+        while True:
+            jobs = self._take(await self.queue.get())
+            try:
+                await self._reconcile_retrying(jobs)
+            finally:
+                for _ in jobs:
+                    self.queue.task_done()
+
+    async def _reconcile_retrying(self, jobs: list[Job]) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                await self._reconcile(jobs)
+                return
+            except Exception as exc:  # keep the worker alive across transient DB errors
+                self.failures += 1
+                if attempt == self.retries:
+                    trades = sum(len(job.trade_ids) for job in jobs)
+                    self.dropped += trades
+                    print(f"reconciliation of {len(jobs)} ingest batches ({trades} trades) failed for good: {exc!r}; "
+                          "run --full-rebuild and --sweep-breaks")
+                    return
+                delay = self.retry_delay * 2 ** attempt
+                print(f"reconciliation of {len(jobs)} ingest batches failed: {exc!r}; retrying in {delay:g}s")
+                await asyncio.sleep(delay)
+
+    async def _reconcile(self, jobs: list[Job]) -> None:
+        trade_ids = [i for job in jobs for i in job.trade_ids]
+        ts_range = (min(job.ts_lo for job in jobs), max(job.ts_hi for job in jobs))
+        async with self.session_factory() as session:
+            await self.handler(session, trade_ids, ts_range)
+            await session.commit()
+        self.rounds += 1
+        self.jobs += len(jobs)
+        self.trades += len(trade_ids)
+        self.max_lag = max(self.max_lag, time.monotonic() - min(job.queued_at for job in jobs))
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "jobs": self.jobs,
+            "trades": self.trades,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "max_lag_ms": self.max_lag * 1000,
+        }
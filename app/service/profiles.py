@@ -0,0 +1,84 @@
+"""
+Transport profiles for the grpc.aio server.
+
+A profile bundles the server knobs that trade throughput against latency and
+resource use: the cap on concurrent RPCs, message size limits, keepalive,
+gzip on responses and HTTP/2 flow control windows. Pick a built-in one with
+`--profile` / GRPC_SERVER_PROFILE, or point GRPC_SERVER_PROFILE_FILE at a JSON
+object that overrides fields of the default profile, e.g.
+
+    {"max_concurrent_rpcs": 128, "gzip": true}
+
+`python -m bench.server_profiles` compares them on this machine.
+"""
+
+import json
+import os
+from typing import NamedTuple
+
+import grpc
+
+_MB = 1024 * 1024
+
+class ServerProfile(NamedTuple):
+    max_concurrent_rpcs: int = 0       # 0 = unlimited; excess calls fail with RESOURCE_EXHAUSTED
+    max_concurrent_streams: int = 0    # per HTTP/2 connection; 0 = gRPC default
+    max_receive_mb: int = 16           # an ingest batch of 5000 packed trades is ~200 KB
+    max_send_mb: int = 64              # Get* return whole tables in one message
+    keepalive_time_ms: int = 60000     # server pings idle connections this often
+    keepalive_timeout_ms: int = 20000
+    gzip: bool = False                 # compress responses
+    window_kb: int = 0                 # fixed HTTP/2 stream window; 0 = sized by BDP probing
+
+    def options(self) -> list[tuple]:
+        opts = [
+            ("grpc.max_receive_message_length", self.max_receive_mb * _MB),
+            ("grpc.max_send_message_length", self.max_send_mb * _MB),
+            ("grpc.keepalive_time_ms", self.keepalive_time_ms),
+            ("grpc.keepalive_timeout_ms", self.keepalive_timeout_ms),
+            # accept the keepalive pings long-lived clients send on idle channels
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.min_recv_ping_interval_without_data_ms", 10000),
+        ]
+        if self.max_concurrent_streams:
+            opts.append(("grpc.max_concurrent_streams", self.max_concurrent_streams))
+        if self.window_kb:
+            opts += [("grpc.http2.bdp_probe", 0), ("grpc.http2.lookahead_bytes", self.window_kb * 1024)]
+        return opts
+
+    def server_kwargs(self) -> dict:
+        """Keyword arguments for grpc.aio.server()."""
+        return {
+            "options": self.options(),
+            "maximum_concurrent_rpcs": self.max_concurrent_rpcs or None,
+            "compression": grpc.Compression.Gzip if self.gzip else None,
+        }
+
+PROFILES = {
+    "default": ServerProfile(),
+    # many clients pushing large batches over a fast network
+    "throughput": ServerProfile(max_concurrent_rpcs=256, max_receive_mb=64, window_kb=8192),
+    # small calls; bounded concurrency keeps queueing delay down under overload. Open streams
+    # count too: each dashboard process holds one WatchChanges call, each streaming ingest one.
+    "low-latency": ServerProfile(max_concurrent_rpcs=64, max_concurrent_streams=32, keepalive_time_ms=10000,
+                                 keepalive_timeout_ms=5000, window_kb=256),
+    # slow or metered links: compress responses, detect dead peers early
+    "wan": ServerProfile(gzip=True, keepalive_time_ms=30000, keepalive_timeout_ms=10000),
+}
+
+def load_profile(name: str = "", path: str = "") -> ServerProfile:
+    """A built-in profile by name, or the default one with the overrides from a JSON file."""
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(ServerProfile._fields)
+        if unknown:
+            raise ValueError(f"{path}: unknown profile fields {sorted(unknown)}")
+        return PROFILES["default"]._replace(**overrides)
+    try:
+        return PROFILES[name or "default"]
+    except KeyError:
+        raise ValueError(f"unknown server profile {name!r}; expected one of {sorted(PROFILES)}") from None
+
+SERVER_PROFILE = os.getenv("GRPC_SERVER_PROFILE", "default")
+SERVER_PROFILE_FILE = os.getenv("GRPC_SERVER_PROFILE_FILE", "")
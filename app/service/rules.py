@@ -0,0 +1,111 @@
+"""
+Declarative match rules for break detection.
+
+A rule compares one field of a booked trade with the same field of its latest
+counterparty row and names the break reason when they disagree beyond a
+tolerance. Rules are checked in order and the first failing one gives the
+reason, so the whole list compiles into a single CASE expression (SQL engine)
+or a sequence of array masks (vectorized.match). Adding a rule adds a predicate,
+not another scan.
+
+The defaults reproduce the original quantity checks. To change them point
+MATCH_RULES_FILE at a JSON list such as
+
+    [{"field": "qty",   "comparator": "gt", "reason": "Quantity Mismatch: Overstated"},
+     {"field": "qty",   "comparator": "lt", "reason": "Quantity Mismatch: Understated"},
+     {"field": "price", "comparator": "eq", "reason": "Price Mismatch", "rel_tol": 0.0005},
+     {"field": "trade_ts", "comparator": "eq", "reason": "Timestamp Drift", "abs_tol": 2}]
+"""
+
+import functools
+import json
+import os
+from typing import NamedTuple
+
+MISSING_REASON = "Missing Trade"
+
+# field -> kind; trade_ts differences and tolerances are in seconds
+FIELDS = {"qty": "number", "price": "number", "trade_ts": "time", "symbol": "text", "side": "text"}
+# eq: differs by more than the tolerance either way; gt / lt: counterparty above / below booked
+COMPARATORS = ("eq", "gt", "lt")
+
+class MatchRule(NamedTuple):
+    field: str
+    comparator: str
+    reason: str
+    abs_tol: float = 0.0
+    rel_tol: float = 0.0  # fraction of the booked value
+
+    def validate(self) -> "MatchRule":
+        if self.field not in FIELDS:
+            raise ValueError(f"unknown match field {self.field!r}; expected one of {sorted(FIELDS)}")
+        if self.comparator not in COMPARATORS:
+            raise ValueError(f"unknown comparator {self.comparator!r}; expected one of {COMPARATORS}")
+        if self.abs_tol < 0 or self.rel_tol < 0:
+            raise ValueError(f"{self.field}: tolerances must not be negative")
+        if FIELDS[self.field] == "text" and (self.comparator != "eq" or self.abs_tol or self.rel_tol):
+            raise ValueError(f"{self.field} is compared exactly; only 'eq' without tolerance applies")
+        if not self.reason or self.reason == MISSING_REASON:
+            raise ValueError(f"{self.field}: reason must be set and differ from {MISSING_REASON!r}")
+        return self
+
+DEFAULT_RULES = (
+    MatchRule("qty", "gt", "Quantity Mismatch: Overstated"),
+    MatchRule("qty", "lt", "Quantity Mismatch: Understated"),
+)
+
+def load_rules(path: str) -> tuple[MatchRule, ...]:
+    with open(path) as f:
+        spec = json.load(f)
+    return tuple(
+        MatchRule(r["field"], r["comparator"], r["reason"],
+                  float(r.get("abs_tol", 0)), float(r.get("rel_tol", 0))).validate()
+        for r in spec
+    )
+
+MATCH_RULES_FILE = os.getenv("MATCH_RULES_FILE", "")
+MATCH_RULES = load_rules(MATCH_RULES_FILE) if MATCH_RULES_FILE else DEFAULT_RULES
+
+def reasons(rules) -> list[str]:
+    """Every reason the rules can produce, MISSING_REASON first; a reason's code is its index + 1."""
+    return list(dict.fromkeys([MISSING_REASON, *(r.reason for r in rules)]))
+
+def fields(rules) -> list[str]:
+    return list(dict.fromkeys(r.field for r in rules))
+
+# ------------------- SQL -------------------
+def sql_literal(s: str) -> str:
+    return "'" + s.replace("'", "''") + "'"
+
+def _sql_value(field: str, alias: str) -> str:
+    if FIELDS[field] == "time":
+        return f"EXTRACT(EPOCH FROM {alias}.{field})"
+    return f"{alias}.{field}"
+
+def _sql_predicate(rule: MatchRule, booked: str, cp: str) -> str:
+    t, c = _sql_value(rule.field, booked), _sql_value(rule.field, cp)
+    if not (rule.abs_tol or rule.rel_tol):
+        return f"{c} {dict(eq='<>', gt='>', lt='<')[rule.comparator]} {t}"
+    tol = f"GREATEST({rule.abs_tol!r}, {rule.rel_tol!r} * abs({t}))" if rule.rel_tol else repr(rule.abs_tol)
+    diff = {"eq": f"abs({c} - {t})", "gt": f"{c} - {t}", "lt": f"{t} - {c}"}[rule.comparator]
+    return f"{diff} > {tol}"
+
+@functools.lru_cache
+def compile_sql(rules: tuple[MatchRule, ...], booked: str = "t", cp: str = "cp") -> str:
+    """CASE expression giving the break reason (NULL when matched) for a booked/cp row pair."""
+    whens = [f"WHEN {cp}.trade_id IS NULL THEN {sql_literal(MISSING_REASON)}"]
+    whens += [f"WHEN {_sql_predicate(r, booked, cp)} THEN {sql_literal(r.reason)}" for r in rules]
+    return "CASE " + "\n                    ".join(whens) + "\n               END"
+
+def column_sql(field: str, alias: str = "") -> tuple[str, str]:
+    """Fixed-width SQL expression and NumPy type for loading `field` into an array.
+
+    Text fields are loaded as hashtext() codes; they are only ever compared for equality.
+    """
+    col = f"{alias}.{field}" if alias else field
+    kind = FIELDS[field]
+    if kind == "text":
+        return f"hashtext({col})", "i4"
+    if kind == "time":
+        return f"EXTRACT(EPOCH FROM {col})::float8", "f8"
+    return f"{col}::float8", "f8"
@@ -6,21 +6,56 @@ Fast gRPC service implementing:
 • Position recalculation
 """
 
+import argparse
 import asyncio
+import functools
+import multiprocessing
 from datetime import datetime, timezone
 from pathlib import Path
-from concurrent import futures
+import os
 import random
+import signal
 import sys
 
 import grpc
 from grpc_tools import protoc
-from sqlalchemy import select, text
+from sqlalchemy import select, text, tuple_
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import async_session, engine
-from app import models
+from app.cache import VersionedCache
+from app.db import async_session, engine, pool_stats
+from app import migrations, models, partitions
+from app.service import bulk, changes, codec, fuzzy, pipeline, profiles, rules, vectorized
+
+# "bulk" (COPY, no ORM objects) or "orm" (session.add_all, kept for comparison)
+INGEST_ENGINE = os.getenv("INGEST_ENGINE", "bulk")
+# trades per IngestTrades sub-transaction; bounds server memory for long streams
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "5000"))
+# seconds between scheduled full break sweeps; 0 disables the schedule
+BREAK_SWEEP_INTERVAL = float(os.getenv("BREAK_SWEEP_INTERVAL", "0"))
+# engine for full break sweeps: "sql" (in Postgres) or "numpy" (in memory, needs numpy)
+RECON_ENGINE = os.getenv("RECON_ENGINE", "sql")
+# "inline" (positions/breaks inside the ingest RPC) or "async" (queued, see app.service.pipeline)
+RECON_MODE = os.getenv("RECON_MODE", "inline")
+RECON_WORKERS = int(os.getenv("RECON_WORKERS", "2"))
+RECON_QUEUE_DEPTH = int(os.getenv("RECON_QUEUE_DEPTH", "100"))  # ingest batches; ingest waits when full
+RECON_COALESCE = int(os.getenv("RECON_COALESCE", "20000"))      # max trades per recon transaction
+RECON_RETRIES = int(os.getenv("RECON_RETRIES", "5"))            # per failed recon transaction
+RECON_RETRY_DELAY = float(os.getenv("RECON_RETRY_DELAY", "0.5"))  # seconds, doubled after each retry
+# max concurrent ingest chunks booked and reconciled together in one transaction
+INGEST_GROUP_MAX = int(os.getenv("INGEST_GROUP_MAX", "8"))
+
+# transaction-level advisory lock taken by full break sweeps
+SWEEP_LOCK = 0x7265636F6E02
+
+# seconds between partition maintenance runs (create upcoming days, retire old ones)
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+
+# server processes sharing the port via SO_REUSEPORT; each has its own DB pool
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+# seconds in-flight RPCs get to finish on SIGTERM / SIGINT
+SHUTDOWN_GRACE = float(os.getenv("SHUTDOWN_GRACE", "10"))
 
 # ------------------- compile protobuf -------------------
 PROTO_DIR = Path(__file__).resolve().parent.parent.parent / "proto"
@@ -43,124 +78,858 @@ import reconcile_pb2_grpc as pb2_grpc  # type: ignore
 async def _init_db() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(models.Base.metadata.create_all)
+        await migrations.migrate(conn)
+        await partitions.ensure_partitions(conn)
 
-def _simulate_counterparty(trades: list[models.Trade]) -> list[models.CounterpartyTrade]:
-    """Copy 90 % of trades; 10 % are missing; 10 % of copied trades get qty tweak."""
+def _simulate_counterparty(trades) -> list[tuple]:
+    """Copy 90 % of trades; 10 % are missing; 10 % of copied trades get qty tweak.
+
+    Accepts ORM trades or bulk.BookedTrade rows and returns counterparty rows as
+    (trade_id, symbol, side, qty, price, trade_ts) tuples.
+    """
     cp = []
     for t in trades:
-        if random.random() >= 0.90:  # missing 10 %
+        if random.random() >= 0.90:  # missing 10 %
             continue
         new_qty = t.qty
-        if random.random() < 0.10:  # alter qty 10 % of included trades
+        if random.random() < 0.10:  # alter qty 10 % of included trades
             delta = random.randint(-20, 20)
             new_qty = max(1, t.qty + delta)
-        cp.append(
-            models.CounterpartyTrade(
-                trade_id=t.trade_id,
-                symbol=t.symbol,
-                side=t.side,
-                qty=new_qty,
-                price=t.price,
-                trade_ts=t.trade_ts,
-            )
-        )
+        cp.append((t.trade_id, t.symbol, t.side, new_qty, t.price, t.trade_ts))
     return cp
 
-async def _recalc_positions(session: AsyncSession):
+def _ts_range(trades) -> tuple[datetime | None, datetime | None]:
+    stamps = [t.trade_ts for t in trades]
+    return (min(stamps), max(stamps)) if stamps else (None, None)
+
+async def _advisory_lock(session: AsyncSession, key: int) -> None:
+    """Wait for `key` across all server processes and cron jobs; released at commit."""
+    await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": key})
+
+async def _recalc_positions(
+    session: AsyncSession, trade_ids: list[int], ts_range: tuple[datetime, datetime]
+) -> list[tuple[str, bool]]:
+    """Fold only the given (just booked) trades into positions.
+
+    ts_range is the batch's min/max trade_ts; it lets Postgres prune the
+    trades partitions down to the days the batch actually touches. Returns
+    (symbol, is_new) for every position it touched. Only those symbols' rows
+    are locked, in symbol order, so recalcs of other symbols run in parallel
+    and overlapping ones queue per row without deadlocking.
+    """
     sql = text(
         """
-        INSERT INTO positions(symbol, net_qty, vwap)
+        INSERT INTO positions(symbol, net_qty, gross_qty, notional, vwap, trade_count)
         SELECT symbol,
                SUM(CASE side WHEN 'BUY' THEN qty ELSE -qty END) AS net_qty,
-               SUM(price * qty)::numeric / NULLIF(SUM(qty),0)  AS vwap
+               SUM(qty)                                         AS gross_qty,
+               SUM(price * qty)                                 AS notional,
+               COALESCE(SUM(price * qty)::numeric / NULLIF(SUM(qty),0), 0) AS vwap,
+               COUNT(*)                                         AS trade_count
         FROM trades
+        WHERE trade_id = ANY(:ids) AND trade_ts BETWEEN :ts_lo AND :ts_hi
         GROUP BY symbol
+        ORDER BY symbol  -- same row-lock order in concurrent recalcs, so they cannot deadlock
         ON CONFLICT(symbol) DO UPDATE
-        SET net_qty = EXCLUDED.net_qty,
-            vwap    = EXCLUDED.vwap;
+        SET net_qty   = positions.net_qty   + EXCLUDED.net_qty,
+            gross_qty = positions.gross_qty + EXCLUDED.gross_qty,
+            notional  = positions.notional  + EXCLUDED.notional,
+            trade_count = positions.trade_count + EXCLUDED.trade_count,
+            vwap      = COALESCE((positions.notional + EXCLUDED.notional)
+                                 / NULLIF(positions.gross_qty + EXCLUDED.gross_qty, 0), 0)
+        RETURNING symbol, xmax = 0 AS inserted;
         """
     )
-    await session.execute(sql)
+    return (await session.execute(sql, {"ids": trade_ids, "ts_lo": ts_range[0], "ts_hi": ts_range[1]})).all()
+
+async def _rebuild_positions(session: AsyncSession):
+    """Repair path: re-aggregate positions from the full trades table.
 
-async def _detect_breaks(session: AsyncSession):
-    await session.execute(text("DELETE FROM breaks"))  # clear old breaks for simplicity
-    # quantity mismatches
-    qty_sql = text(
+    The table lock makes concurrent recalcs wait for the rebuild to commit.
+    """
+    await session.execute(text("LOCK TABLE positions IN EXCLUSIVE MODE"))
+    await session.execute(text("DELETE FROM positions"))
+    sql = text(
         """
-        INSERT INTO breaks(trade_id, reason)
-        SELECT t.trade_id,
-               CASE WHEN cp.qty > t.qty THEN 'Quantity Mismatch: Overstated'
-                    ELSE 'Quantity Mismatch: Understated' END
-        FROM trades t
-        JOIN counterparty_trades cp USING(trade_id)
-        WHERE t.qty <> cp.qty;
+        INSERT INTO positions(symbol, net_qty, gross_qty, notional, vwap, trade_count)
+        SELECT symbol,
+               SUM(CASE side WHEN 'BUY' THEN qty ELSE -qty END) AS net_qty,
+               SUM(qty)                                         AS gross_qty,
+               SUM(price * qty)                                 AS notional,
+               COALESCE(SUM(price * qty)::numeric / NULLIF(SUM(qty),0), 0) AS vwap,
+               COUNT(*)                                         AS trade_count
+        FROM trades
+        GROUP BY symbol;
         """
     )
-    await session.execute(qty_sql)
+    await session.execute(sql)
+    await changes.record(session, refresh=["positions"])
 
-    missing_sql = text(
-        """
-        INSERT INTO breaks(trade_id, reason)
-        SELECT t.trade_id, 'Missing Trade'
+# Classifies each booked trade in {scope} against its latest counterparty row with
+# the compiled match rules ({reason}), resolves breaks that no longer apply and
+# upserts the rest. detected_ts is only reset when the reason changes, so a
+# long-standing break keeps its age.
+_BREAKS_SQL = """
+    WITH eval AS (
+        SELECT DISTINCT ON (t.trade_id)
+               t.trade_id,
+               {reason} AS reason
         FROM trades t
         LEFT JOIN counterparty_trades cp USING(trade_id)
-        WHERE cp.trade_id IS NULL;
-        """
+        WHERE {scope}
+        ORDER BY t.trade_id, cp.id DESC
+    ),
+    resolved AS (
+        DELETE FROM breaks b
+        USING eval e
+        WHERE b.trade_id = e.trade_id AND e.reason IS NULL
+    ),
+    upserted AS (
+        INSERT INTO breaks(trade_id, reason)
+        SELECT trade_id, reason FROM eval WHERE reason IS NOT NULL
+        ON CONFLICT(trade_id) DO UPDATE
+        SET reason      = EXCLUDED.reason,
+            detected_ts = now()
+        WHERE breaks.reason IS DISTINCT FROM EXCLUDED.reason
     )
-    await session.execute(missing_sql)
+    SELECT {result} FROM eval WHERE reason IS NOT NULL;
+"""
+
+@functools.lru_cache
+def _breaks_sql(scope: str, match_rules: tuple[rules.MatchRule, ...] = rules.MATCH_RULES, result: str = "count(*)"):
+    return text(_BREAKS_SQL.format(scope=scope, reason=rules.compile_sql(match_rules), result=result))
+
+async def _detect_breaks(
+    session: AsyncSession, trade_ids: list[int], ts_range: tuple[datetime, datetime] | None = None
+) -> int:
+    """Re-evaluate breaks for the given trade_ids only; returns how many are open.
+
+    ts_range (the trades' min/max trade_ts) is optional but lets Postgres prune partitions.
+    """
+    if ts_range is None:
+        return (await session.execute(_breaks_sql("t.trade_id = ANY(:ids)"), {"ids": trade_ids})).scalar_one()
+    sql = _breaks_sql("t.trade_id = ANY(:ids) AND t.trade_ts BETWEEN :ts_lo AND :ts_hi")
+    params = {"ids": trade_ids, "ts_lo": ts_range[0], "ts_hi": ts_range[1]}
+    return (await session.execute(sql, params)).scalar_one()
+
+async def _reconcile(
+    session: AsyncSession, trade_ids: list[int], ts_range: tuple[datetime, datetime], **change
+) -> set[int]:
+    """Fold just-booked trades into positions and breaks; returns the IDs with an open break.
+
+    The change notice it sends also carries `change` (e.g. the booked trades),
+    so an inline ingest announces everything at once.
+    """
+    moved = await _recalc_positions(session, trade_ids, ts_range)
+    sql = _breaks_sql("t.trade_id = ANY(:ids) AND t.trade_ts BETWEEN :ts_lo AND :ts_hi", result="trade_id")
+    params = {"ids": trade_ids, "ts_lo": ts_range[0], "ts_hi": ts_range[1]}
+    open_ids = set((await session.execute(sql, params)).scalars())
+    # a new symbol needs a row the dashboard does not have yet; reload positions
+    refresh = ["positions"] if any(is_new for _, is_new in moved) else []
+    await changes.record(session, breaks=open_ids, symbols=[symbol for symbol, _ in moved], refresh=refresh, **change)
+    return open_ids
+
+async def _link_counterparty(session: AsyncSession, since: datetime | None = None) -> int:
+    """Fuzzy-link counterparty rows without trade_id and re-check the linked trades; returns the link count."""
+    links = await fuzzy.link_unmatched(session, since)
+    if links:
+        await _detect_breaks(session, [l.trade_id for l in links], _ts_range(links))
+        await changes.record(session, refresh=["counterparty", "breaks"])
+    return len(links)
+
+async def _sweep_breaks(session: AsyncSession, recon_engine: str = RECON_ENGINE, since: datetime | None = None) -> int:
+    """Reconcile every booked trade (from `since` on, if given); returns the number of open breaks.
+
+    Sweeps from other processes (cron, other server workers) wait for this one to commit.
+    """
+    await _advisory_lock(session, SWEEP_LOCK)
+    await session.execute(text(
+        "DELETE FROM breaks b WHERE NOT EXISTS (SELECT 1 FROM trades t WHERE t.trade_id = b.trade_id)"
+    ))
+    if recon_engine == "numpy":
+        open_breaks = await vectorized.reconcile(session, ts_lo=since)
+    else:
+        scope = "TRUE" if since is None else "t.trade_ts >= :since"
+        open_breaks = (await session.execute(_breaks_sql(scope), {"since": since})).scalar_one()
+    await changes.record(session, refresh=["breaks"])
+    return open_breaks
+
+# ------------------- read queries -------------------
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_FETCH_SIZE = 1000  # rows per server-side cursor round trip
+
+# Dashboard totals: trade count, open breaks and sum(qty * price) of trades without a break.
+# "summary" reads the per-symbol totals kept in positions and subtracts the broken trades, so its
+# cost follows the break count, not the trade count; "scan" aggregates trades in one pass.
+SUMMARY_QUERIES = {
+    "summary": text(
+        """SELECT (SELECT COALESCE(SUM(trade_count), 0)::bigint FROM positions),
+                  (SELECT count(*) FROM breaks),
+                  (SELECT COALESCE(SUM(notional), 0) FROM positions)
+                  - (SELECT COALESCE(SUM(t.qty * t.price), 0) FROM breaks b JOIN trades t USING (trade_id))"""
+    ),
+    "scan": text(
+        """SELECT count(*),
+                  (SELECT count(*) FROM breaks),
+                  COALESCE(SUM(t.qty * t.price) FILTER (WHERE b.trade_id IS NULL), 0)
+           FROM trades t LEFT JOIN breaks b USING (trade_id)"""
+    ),
+}
+SUMMARY_SOURCE = os.getenv("SUMMARY_SOURCE", "summary")
+
+def _break_pb(r: models.Break):
+    return pb2.Break(trade_id=r.trade_id, reason=r.reason, detected_ts=r.detected_ts.isoformat())
+
+def _position_pb(r: models.Position):
+    return pb2.Position(symbol=r.symbol, net_qty=float(r.net_qty), vwap=float(r.vwap))
+
+def _trade_row_pb(r: models.Trade | models.CounterpartyTrade):
+    return pb2.TradeRow(trade_id=r.trade_id or 0, symbol=r.symbol, side=r.side, qty=float(r.qty),
+                        price=float(r.price), trade_ts=r.trade_ts.isoformat())
+
+def _page_size(request) -> int:
+    return min(max(request.page_size, 0) or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+def _breaks_query(request):
+    """Keyset-ordered select for a BreakQuery; raises ValueError on malformed input."""
+    if request.newest_first:
+        q = select(models.Break).order_by(models.Break.break_id.desc())
+        if request.page_token:
+            q = q.where(models.Break.break_id < int(request.page_token))
+    else:
+        q = select(models.Break).order_by(models.Break.break_id)
+        if request.page_token:
+            q = q.where(models.Break.break_id > int(request.page_token))
+    if request.symbol:
+        q = q.join(models.Trade, models.Trade.trade_id == models.Break.trade_id).where(
+            models.Trade.symbol == request.symbol
+        )
+    if request.reason:
+        q = q.where(models.Break.reason == request.reason)
+    if request.since:
+        q = q.where(models.Break.detected_ts >= datetime.fromisoformat(request.since))
+    if request.until:
+        q = q.where(models.Break.detected_ts < datetime.fromisoformat(request.until))
+    return q
+
+def _positions_query(request):
+    q = select(models.Position).order_by(models.Position.symbol)
+    if request.page_token:
+        q = q.where(models.Position.symbol > request.page_token)
+    if request.symbol:
+        q = q.where(models.Position.symbol == request.symbol)
+    return q
+
+def _trades_query(model: type[models.Trade] | type[models.CounterpartyTrade], request):
+    """Keyset-ordered select, newest first, for a TradeQuery and the page token of a row.
+
+    Raises ValueError on a malformed page token.
+    """
+    row_id = model.trade_id if model is models.Trade else model.id
+    q = select(model).order_by(model.trade_ts.desc(), row_id.desc())
+    if request.page_token:
+        ts, last_id = request.page_token.rsplit(",", 1)
+        q = q.where(tuple_(model.trade_ts, row_id) < (datetime.fromisoformat(ts), int(last_id)))
+    if request.symbol:
+        q = q.where(model.symbol == request.symbol)
+    if request.side:
+        q = q.where(model.side == request.side)
+    return q, lambda r: f"{r.trade_ts.isoformat()},{getattr(r, row_id.key)}"
+
+async def _fetch_page(query, size: int, key) -> tuple[list, str]:
+    """One page plus the token for the next one (empty when this is the last page)."""
+    async with async_session() as session:
+        rows = (await session.execute(query.limit(size + 1))).scalars().all()
+    if len(rows) <= size:
+        return rows, ""
+    return rows[:size], str(key(rows[size - 1]))
+
+async def _stream_rows(query):
+    """Yield ORM rows through a server-side cursor so memory stays flat."""
+    async with async_session() as session:
+        result = await session.stream(query.execution_options(yield_per=STREAM_FETCH_SIZE))
+        async for row in result.scalars():
+            yield row
+
+async def _data_version() -> int:
+    async with async_session() as session:
+        return await changes.data_version(session)
+
+async def _load_change(change: dict):
+    """Read the rows a change notice names, for WatchChanges."""
+    message = pb2.Change(refresh=change.get("refresh", []))
+    trade_ids, breaks, symbols = change.get("trades"), change.get("breaks"), change.get("symbols")
+    if not (trade_ids or breaks or symbols):
+        return message
+    async with async_session() as session:
+        if trade_ids:
+            ts_lo, ts_hi = (datetime.fromisoformat(ts) for ts in change["ts"])
+            for model, field in ((models.Trade, message.trades), (models.CounterpartyTrade, message.counterparty)):
+                rows = await session.execute(
+                    select(model).where(model.trade_id.in_(trade_ids), model.trade_ts.between(ts_lo, ts_hi))
+                    .order_by(model.trade_id.desc())  # newest first, as the dashboard prepends them
+                )
+                field.extend(_trade_row_pb(r) for r in rows.scalars())
+        if breaks:
+            rows = await session.execute(
+                select(models.Break).where(models.Break.trade_id.in_(breaks)).order_by(models.Break.break_id.desc())
+            )
+            message.breaks.extend(_break_pb(r) for r in rows.scalars())
+        if symbols:
+            rows = await session.execute(select(models.Position).where(models.Position.symbol.in_(symbols)))
+            message.positions.extend(_position_pb(r) for r in rows.scalars())
+    return message
+
+async def _is_booked(trade) -> bool:
+    """Whether `trade` is visible in trades, i.e. the transaction that booked it committed."""
+    async with async_session() as session:
+        sql = text("SELECT EXISTS (SELECT 1 FROM trades WHERE trade_id = :id AND trade_ts = :ts)")
+        return (await session.execute(sql, {"id": trade.trade_id, "ts": trade.trade_ts})).scalar_one()
+
+# ------------------- recalc coordination -------------------
+class RecalcCoordinator:
+    """Single-flight runner that collapses overlapping requests into one run.
+
+    The first submit starts a run at once. Items submitted while it is in
+    progress queue up and the next run takes all of them (at most `max_items`),
+    so N concurrent callers cost about two runs instead of N competing ones.
+    run_group(items) returns one result per item, and each caller gets its own.
+    If a group fails, its items are retried one by one, so one bad item does
+    not fail the others.
+    """
+
+    def __init__(self, run_group, max_items: int = INGEST_GROUP_MAX):
+        self.run_group = run_group
+        self.max_items = max(1, max_items)
+        self._pending: list[tuple[object, asyncio.Future]] = []
+        self._leader: asyncio.Task | None = None
+        self.rounds = 0  # runs started
+        self.items = 0   # items they covered
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if self._leader is None:
+            # a separate task, so a caller that goes away does not cancel the others' run
+            self._leader = asyncio.create_task(self._drain())
+        return await future
+
+    async def _drain(self) -> None:
+        try:
+            while self._pending:
+                group, self._pending = self._pending[:self.max_items], self._pending[self.max_items:]
+                await self._run(group, retry_alone=len(group) > 1)
+        finally:
+            self._leader = None
+
+    async def _run(self, group: list, retry_alone: bool) -> None:
+        self.rounds += 1
+        self.items += len(group)
+        try:
+            results = await self.run_group([item for item, _ in group])
+        except Exception as exc:
+            if retry_alone:
+                for entry in group:
+                    await self._run([entry], retry_alone=False)
+                return
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, future), result in zip(group, results):
+                if not future.done():
+                    future.set_result(result)
 
 # ------------------- gRPC service -------------------
 class ReconcileService(pb2_grpc.ReconcileServiceServicer):
-    async def IngestTrades(self, request_iterator, context):
-        async with async_session() as session:
-            booked: list[models.Trade] = []
-            async for t in request_iterator:
-                booked.append(
-                    models.Trade(
-                        symbol=t.symbol,
-                        side=t.side,
-                        qty=t.qty,
-                        price=t.price,
-                        trade_ts=datetime.fromisoformat(t.trade_ts),
-                    )
+    def __init__(self, ingest_engine: str = INGEST_ENGINE, chunk_size: int = INGEST_CHUNK_SIZE,
+                 recon: pipeline.ReconPipeline | None = None, group_max: int = INGEST_GROUP_MAX,
+                 worker_id: int = 0):
+        self.ingest_engine = ingest_engine
+        self.chunk_size = chunk_size
+        self.recon = recon  # None reconciles inline
+        self.worker_id = worker_id
+        self.chunks = RecalcCoordinator(self._ingest_group, group_max)
+        self.changes = changes.ChangeFeed(
+            engine.url.set(drivername="postgresql").render_as_string(hide_password=False), _load_change
+        )
+        # List* and GetSummary answers, shared by every client until the data version moves
+        self.cache = VersionedCache(_data_version)
+
+    async def _cached(self, method: str, request, compute):
+        """Answer a read RPC from the cache; compute() builds the response message."""
+        response, version = await self.cache.get((method, request.SerializeToString(deterministic=True)), compute)
+        response.version = version  # the same for every hit of this entry
+        return response
+
+    async def _book(self, session: AsyncSession, rows: list[tuple]) -> tuple[list, list[int]]:
+        """Insert new trades plus their simulated counterparty view.
+
+        Returns the newly booked trades and the trade_id of every row in order;
+        rows whose external_id is already booked get the existing ID.
+        """
+        if self.ingest_engine == "orm":
+            keys = {(ext, ts) for _, _, _, _, ts, ext in rows if ext}
+            known = {}
+            if keys:
+                found = await session.execute(
+                    select(models.Trade).where(tuple_(models.Trade.external_id, models.Trade.trade_ts).in_(keys))
                 )
+                known = {(t.external_id, t.trade_ts): t for t in found.scalars()}
+            booked, per_row = [], []
+            for symbol, side, qty, price, ts, ext in rows:
+                trade = known.get((ext, ts)) if ext else None
+                if trade is None:
+                    trade = models.Trade(symbol=symbol, side=side, qty=qty, price=price, trade_ts=ts, external_id=ext)
+                    booked.append(trade)
+                    if ext:
+                        known[(ext, ts)] = trade
+                per_row.append(trade)
             session.add_all(booked)
             await session.flush()  # assign IDs
+            session.add_all(
+                models.CounterpartyTrade(
+                    trade_id=trade_id, symbol=symbol, side=side, qty=qty, price=price, trade_ts=ts
+                )
+                for trade_id, symbol, side, qty, price, ts in _simulate_counterparty(booked)
+            )
+            await session.flush()
+            return booked, [t.trade_id for t in per_row]
+        booked, trade_ids = await bulk.copy_trades(session, rows)
+        await bulk.copy_counterparty(session, _simulate_counterparty(booked))
+        return booked, trade_ids
 
-            # simulate counterparty trades
-            cps = _simulate_counterparty(booked)
-            session.add_all(cps)
+    async def _ingest_chunk(self, rows: list[tuple]) -> tuple[list[int], int, int]:
+        """Book, reconcile and commit one chunk.
 
-            # recalc positions & breaks
-            await session.flush()
-            await _recalc_positions(session)
-            await _detect_breaks(session)
-            await session.commit()
+        Returns the trade_id of every row, how many rows were new and the open
+        break count among them. Duplicates are not reconciled again. With a
+        recon pipeline the chunk is committed first and reconciled later, and
+        the break count is always 0. Chunks of concurrent RPCs share one
+        transaction, see RecalcCoordinator. Naive trade_ts values are taken as UTC.
+        """
+        if any(r[4].tzinfo is None for r in rows):
+            rows = [(*r[:4], codec.parse_ts(r[4]), r[5]) for r in rows]
+        return await self.chunks.submit(rows)
+
+    async def _ingest_group(self, chunks: list[list[tuple]]) -> list[tuple[list[int], int, int]]:
+        """Book several chunks and reconcile all their new trades in one transaction.
+
+        Raises only if nothing was committed: a failure while committing or
+        closing the session is checked against the database first, because the
+        coordinator retries failed chunks and would book them a second time.
+        """
+        committing = False
+        try:
+            async with async_session() as session:
+                booked_all, results = [], []
+                for rows in chunks:
+                    booked, trade_ids = await self._book(session, rows)
+                    booked_all.extend(booked)
+                    results.append((trade_ids, booked))
+                new_ids = [t.trade_id for t in booked_all]
+                open_ids: set[int] = set()
+                if new_ids and self.recon is None:
+                    open_ids = await _reconcile(session, new_ids, _ts_range(booked_all),
+                                                trades=new_ids, ts=_ts_range(booked_all))
+                elif new_ids:
+                    await changes.record(session, trades=new_ids, ts=_ts_range(booked_all))
+                committing = True
+                await session.commit()
+        except Exception as exc:
+            if not (committing and new_ids and await _is_booked(booked_all[0])):
+                raise
+            print(f"ingest of {len(chunks)} chunks committed despite {exc!r}")
+        if new_ids:
+            self.cache.invalidate()
+        if new_ids and self.recon is not None:
+            await self.recon.submit(new_ids, _ts_range(booked_all))
+        return [
+            (trade_ids, len(booked), sum(t.trade_id in open_ids for t in booked))
+            for trade_ids, booked in results
+        ]
+
+    async def IngestTrades(self, request_iterator, context):
+        """Book the stream in chunks of `chunk_size`, each committed on its own.
+
+        The iterator is not read while a chunk is being written, so gRPC flow
+        control pushes back on fast clients instead of the server buffering the
+        whole stream. A stream that fails midway keeps the chunks already committed.
+        """
+        inserted = received = 0
+        chunk: list[tuple] = []
+        async for t in request_iterator:
+            chunk.append((t.symbol, t.side, t.qty, t.price, codec.parse_ts(t.trade_ts), t.external_id or None))
+            if len(chunk) >= self.chunk_size:
+                _, new, _ = await self._ingest_chunk(chunk)
+                inserted += new
+                received += len(chunk)
+                chunk = []
+        if chunk:
+            _, new, _ = await self._ingest_chunk(chunk)
+            inserted += new
+            received += len(chunk)
+
+        return pb2.IngestResponse(inserted=inserted, duplicates=received - inserted)
+
+    async def IngestTradesStream(self, request_iterator, context):
+        """Each TradeBatch is committed on its own and acknowledged as soon as it is."""
+        async for batch in request_iterator:
+            try:
+                rows = codec.decode_batch(batch)
+            except ValueError as exc:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"batch {batch.batch_seq}: {exc}")
+            trade_ids, new, open_breaks = await self._ingest_chunk(rows)
+            yield pb2.IngestAck(
+                batch_seq=batch.batch_seq, trade_ids=trade_ids, breaks=open_breaks, duplicates=len(rows) - new
+            )
+
+    async def LoadCounterparty(self, request_iterator, context):
+        """Store a counterparty file chunk by chunk, then fuzzy-match the rows without trade_id.
 
-        return pb2.IngestResponse(inserted=len(booked))
+        Each chunk is committed with the breaks of the trades it confirms, so a
+        failed upload keeps what was already loaded; resending it is harmless
+        for rows that carry a trade_id.
+        """
+        received = inserted = 0
+        since = None
+        async with async_session() as session:
+            async for batch in request_iterator:
+                try:
+                    rows = codec.decode_counterparty(batch)
+                except ValueError as exc:
+                    await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"after {received} rows: {exc}")
+                if not rows:
+                    continue
+                received += len(rows)
+                count, trade_ids = await bulk.load_counterparty(session, rows)
+                inserted += count
+                if trade_ids:
+                    await _detect_breaks(session, trade_ids)
+                await changes.record(session, refresh=["counterparty", "breaks"])
+                await session.commit()
+                since = min(since or rows[0][5], *(r[5] for r in rows))
+            fuzzy_linked = await _link_counterparty(session, since) if since else 0
+            await session.commit()
+        self.cache.invalidate()
+        return pb2.LoadSummary(received=received, inserted=inserted, fuzzy_linked=fuzzy_linked)
 
     async def GetPositions(self, request, context):
         async with async_session() as session:
             rows = (await session.execute(select(models.Position))).scalars().all()
-            return pb2.Positions(
-                items=[pb2.Position(symbol=r.symbol, net_qty=float(r.net_qty), vwap=float(r.vwap)) for r in rows]
-            )
+            return pb2.Positions(items=[_position_pb(r) for r in rows])
 
     async def GetBreaks(self, request, context):
         async with async_session() as session:
             rows = (await session.execute(select(models.Break))).scalars().all()
-            return pb2.Breaks(
-                items=[pb2.Break(trade_id=r.trade_id, reason=r.reason, detected_ts=r.detected_ts.isoformat()) for r in rows]
-            )
+            return pb2.Breaks(items=[_break_pb(r) for r in rows])
 
-async def serve():
-    await _init_db()
-    server = grpc.aio.server(futures.ThreadPoolExecutor())
-    pb2_grpc.add_ReconcileServiceServicer_to_server(ReconcileService(), server)
+    async def ListBreaks(self, request, context):
+        try:
+            query = _breaks_query(request)
+        except ValueError as exc:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(exc))
+
+        async def page():
+            rows, token = await _fetch_page(query, _page_size(request), lambda r: r.break_id)
+            return pb2.BreakPage(items=[_break_pb(r) for r in rows], next_page_token=token)
+
+        return await self._cached("ListBreaks", request, page)
+
+    async def StreamBreaks(self, request, context):
+        try:
+            query = _breaks_query(request)
+        except ValueError as exc:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(exc))
+        async for r in _stream_rows(query):
+            yield _break_pb(r)
+
+    async def ListPositions(self, request, context):
+        async def page():
+            rows, token = await _fetch_page(_positions_query(request), _page_size(request), lambda r: r.symbol)
+            return pb2.PositionPage(items=[_position_pb(r) for r in rows], next_page_token=token)
+
+        return await self._cached("ListPositions", request, page)
+
+    async def StreamPositions(self, request, context):
+        async for r in _stream_rows(_positions_query(request)):
+            yield _position_pb(r)
+
+    async def WatchChanges(self, request, context):
+        async for change in self.changes.subscribe():
+            yield change
+
+    async def _list_trades(self, model, request, context):
+        try:
+            query, key = _trades_query(model, request)
+        except ValueError as exc:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"bad page_token: {exc}")
+
+        async def page():
+            rows, token = await _fetch_page(query, _page_size(request), key)
+            return pb2.TradePage(items=[_trade_row_pb(r) for r in rows], next_page_token=token)
+
+        return await self._cached(model.__tablename__, request, page)
+
+    async def ListTrades(self, request, context):
+        return await self._list_trades(models.Trade, request, context)
+
+    async def ListCounterparty(self, request, context):
+        return await self._list_trades(models.CounterpartyTrade, request, context)
+
+    async def GetSummary(self, request, context):
+        async def summary():
+            async with async_session() as session:
+                trades, breaks, pnl = (await session.execute(SUMMARY_QUERIES[SUMMARY_SOURCE])).one()
+            return pb2.Summary(trades=trades, breaks=breaks, pnl=round(float(pnl), 2))
+
+        return await self._cached("GetSummary", request, summary)
+
+    async def GetDataVersion(self, request, context):
+        return pb2.DataVersion(version=await self.cache.version())
+
+    async def ClearAll(self, request, context):
+        async with async_session() as session:
+            for model in (models.Break, models.Position, models.CounterpartyTrade, models.Trade):
+                await session.execute(model.__table__.delete())
+            await changes.record(session, refresh=changes.TABLES)
+            await session.commit()
+        self.cache.invalidate()
+        return pb2.Empty()
+
+    async def GetServerStats(self, request, context):
+        pool = pool_stats()
+        recon = self.recon.stats() if self.recon else {}
+        cache = self.cache.stats()
+        return pb2.ServerStats(
+            worker_id=self.worker_id,
+            cache_entries=cache["entries"],
+            cache_hits=cache["hits"],
+            cache_misses=cache["misses"],
+            data_version=cache["version"] or 0,
+            recon_queue_depth=recon.get("depth", 0),
+            recon_queue_capacity=recon.get("capacity", 0),
+            recon_rounds=recon.get("rounds", 0),
+            recon_batches=recon.get("jobs", 0),
+            recon_failures=recon.get("failures", 0),
+            recon_dropped=recon.get("dropped", 0),
+            recon_max_lag_ms=recon.get("max_lag_ms", 0.0),
+            ingest_rounds=self.chunks.rounds,
+            ingest_chunks=self.chunks.items,
+            pool_size=pool["size"],
+            pool_checked_out=pool["checked_out"],
+            pool_checked_in=pool["checked_in"],
+            pool_overflow=pool["overflow"],
+            pool_waits=pool["waits"],
+            pool_wait_avg_ms=pool["wait_avg_ms"],
+            pool_wait_max_ms=pool["wait_max_ms"],
+        )
+
+async def _sweep_periodically(interval: float, recon_engine: str):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sweep_breaks(recon_engine)
+        except Exception as exc:  # keep the schedule alive across transient DB errors
+            print(f"scheduled break sweep failed: {exc!r}")
+
+async def _maintain_partitions_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await maintain_partitions()
+        except Exception as exc:
+            print(f"partition maintenance failed: {exc!r}")
+
+async def serve(ingest_engine: str = INGEST_ENGINE, chunk_size: int = INGEST_CHUNK_SIZE,
+                recon_engine: str = RECON_ENGINE, recon_mode: str = RECON_MODE,
+                recon_workers: int = RECON_WORKERS, worker_id: int | None = None,
+                profile: profiles.ServerProfile | None = None):
+    """Run the gRPC server until SIGTERM / SIGINT.
+
+    profile defaults to GRPC_SERVER_PROFILE / GRPC_SERVER_PROFILE_FILE.
+
+    worker_id is set when running as one of several --workers processes: the
+    parent has already initialised the database, the port is shared with
+    SO_REUSEPORT, and only worker 0 runs the scheduled sweeps and maintenance.
+    """
+    if worker_id is None:
+        await _init_db()
+    recon = None
+    if recon_mode == "async":
+        recon = pipeline.ReconPipeline(_reconcile, async_session, recon_workers, RECON_QUEUE_DEPTH, RECON_COALESCE,
+                                         RECON_RETRIES, RECON_RETRY_DELAY)
+        recon.start()
+    profile = profile or profiles.load_profile(profiles.SERVER_PROFILE, profiles.SERVER_PROFILE_FILE)
+    kwargs = profile.server_kwargs()
+    # a lone server should fail on a busy port rather than silently share it
+    kwargs["options"].append(("grpc.so_reuseport", 0 if worker_id is None else 1))
+    server = grpc.aio.server(**kwargs)
+    service = ReconcileService(ingest_engine, chunk_size, recon, worker_id=worker_id or 0)
+    pb2_grpc.add_ReconcileServiceServicer_to_server(service, server)
     server.add_insecure_port("0.0.0.0:50051")
     await server.start()
-    print("gRPC server running on 0.0.0.0:50051")
-    await server.wait_for_termination()
+    print("gRPC server running on 0.0.0.0:50051" + ("" if worker_id is None else f" (worker {worker_id})"))
+    background: list[asyncio.Task] = []  # scheduled jobs; stopped before the engine is disposed
+    if worker_id in (None, 0):
+        if BREAK_SWEEP_INTERVAL > 0:
+            background.append(asyncio.create_task(_sweep_periodically(BREAK_SWEEP_INTERVAL, recon_engine)))
+        if PARTITION_MAINTENANCE_INTERVAL > 0:
+            background.append(asyncio.create_task(
+                _maintain_partitions_periodically(PARTITION_MAINTENANCE_INTERVAL)
+            ))
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+    try:
+        await stopping.wait()
+        await server.stop(SHUTDOWN_GRACE)  # refuse new RPCs, let in-flight ones finish
+    finally:
+        for task in background:
+            task.cancel()  # a sweep cut short rolls back; the next run redoes it
+        await asyncio.gather(*background, return_exceptions=True)
+        await service.changes.close()
+        if recon is not None:
+            await recon.stop()  # reconcile what was already acknowledged
+        await engine.dispose()
+
+# ------------------- multi-process -------------------
+def _run_worker(worker_id: int, options: dict) -> None:
+    asyncio.run(serve(**options, worker_id=worker_id))
+
+async def _init_db_once() -> None:
+    await _init_db()
+    await engine.dispose()  # the workers open their own pools
+
+def serve_workers(workers: int, **options) -> int:
+    """Run `workers` server processes on one port; returns the exit status.
+
+    The database is initialised once here before any worker starts. Workers
+    are spawned, not forked, so none inherits this process's gRPC or asyncpg
+    state. SIGTERM / SIGINT are forwarded for a graceful stop. If a worker dies
+    on its own, the rest are stopped too so a supervisor can restart the set.
+    """
+    asyncio.run(_init_db_once())
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_run_worker, args=(i, options), name=f"reconcile-worker-{i}")
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    stopping = False
+    def stop(signum=None, frame=None):
+        nonlocal stopping
+        stopping = True
+        for p in procs:
+            if p.is_alive():
+                p.terminate()  # SIGTERM
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while any(p.is_alive() for p in procs):
+        for p in procs:
+            p.join(timeout=0.5)
+            if p.exitcode is not None and not stopping:
+                print(f"{p.name} exited with status {p.exitcode}; stopping the other workers")
+                stop()
+    return 0 if all(p.exitcode == 0 for p in procs) else 1
+
+async def _init_db_and(job):
+    await _init_db()
+    await job()
+
+async def full_rebuild():
+    async with async_session() as session:
+        await _rebuild_positions(session)
+        await session.commit()
+    print("positions rebuilt from trades")
+
+async def sweep_breaks(recon_engine: str = RECON_ENGINE, since: datetime | None = None):
+    async with async_session() as session:
+        open_breaks = await _sweep_breaks(session, recon_engine, since)
+        await session.commit()
+    print(f"break sweep complete ({recon_engine}): {open_breaks} open breaks")
+
+async def link_counterparty(since: datetime | None = None):
+    async with async_session() as session:
+        linked = await _link_counterparty(session, since)
+        await session.commit()
+    print(f"fuzzy matching linked {linked} counterparty trades")
+
+# change-feed table names (app/service/changes.py) of the partitioned tables
+_PARTITIONED_FEEDS = {"trades": "trades", "counterparty_trades": "counterparty"}
+
+async def maintain_partitions(retention_days: int = partitions.PARTITION_RETENTION_DAYS):
+    async with engine.begin() as conn:
+        created = await partitions.ensure_partitions(conn)
+        retired = await partitions.retire_partitions(conn, retention_days)
+        if retired:  # their rows are gone from the tables; cached pages must not keep serving them
+            await changes.record(conn, refresh=sorted({_PARTITIONED_FEEDS[name.rsplit("_p", 1)[0]] for name in retired}))
+    print(f"partitions created: {created or 'none'}, retired: {retired or 'none'}")
+
+async def partition_existing():
+    async with engine.begin() as conn:
+        converted = await partitions.partition_existing(conn, models.Base.metadata)
+        await partitions.ensure_partitions(conn)
+    print(f"partitioned: {converted or 'nothing to convert'}")
 
 if __name__ == "__main__":
-    asyncio.run(serve())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Reconciliation gRPC server")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="re-aggregate positions from the whole trades table and exit")
+    parser.add_argument("--sweep-breaks", action="store_true",
+                        help="re-check every booked trade for breaks and exit (e.g. from cron)")
+    parser.add_argument("--recon-engine", choices=["sql", "numpy"], default=RECON_ENGINE,
+                        help="engine for break sweeps (default: %(default)s)")
+    parser.add_argument("--since", type=datetime.fromisoformat,
+                        help="with --sweep-breaks / --link-counterparty, only consider trades at or after this ISO timestamp")
+    parser.add_argument("--link-counterparty", action="store_true",
+                        help="fuzzy-match counterparty trades without trade_id to booked trades and exit")
+    parser.add_argument("--maintain-partitions", action="store_true",
+                        help="create upcoming trade-date partitions, retire expired ones and exit")
+    parser.add_argument("--partition-existing", action="store_true",
+                        help="convert unpartitioned trades/counterparty_trades tables and exit")
+    parser.add_argument("--ingest-engine", choices=["bulk", "orm"], default=INGEST_ENGINE,
+                        help="write path for IngestTrades (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE,
+                        help="trades per ingest sub-transaction (default: %(default)s)")
+    parser.add_argument("--recon-mode", choices=["inline", "async"], default=RECON_MODE,
+                        help="reconcile inside the ingest RPC or in a queued background stage (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help="server processes sharing port 50051 via SO_REUSEPORT (default: %(default)s)")
+    parser.add_argument("--profile", choices=sorted(profiles.PROFILES), default=profiles.SERVER_PROFILE,
+                        help="gRPC transport profile, see app/service/profiles.py (default: %(default)s)")
+    parser.add_argument("--profile-file", default=profiles.SERVER_PROFILE_FILE,
+                        help="JSON overrides of the default profile; takes precedence over --profile")
+    parser.add_argument("--recon-workers", type=int, default=RECON_WORKERS,
+                        help="concurrent reconciliation tasks in async recon mode (default: %(default)s)")
+    args = parser.parse_args()
+    if args.recon_engine == "numpy" and not vectorized.available():
+        parser.error("--recon-engine numpy needs numpy installed (pip install numpy)")
+    try:
+        profile = profiles.load_profile(args.profile, args.profile_file)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    if args.full_rebuild:
+        asyncio.run(_init_db_and(full_rebuild))
+    elif args.sweep_breaks:
+        asyncio.run(_init_db_and(lambda: sweep_breaks(args.recon_engine, args.since)))
+    elif args.link_counterparty:
+        asyncio.run(_init_db_and(lambda: link_counterparty(args.since)))
+    elif args.maintain_partitions:
+        asyncio.run(_init_db_and(maintain_partitions))
+    elif args.partition_existing:
+        asyncio.run(_init_db_and(partition_existing))
+    elif args.workers > 1:
+        sys.exit(serve_workers(
+            args.workers, ingest_engine=args.ingest_engine, chunk_size=args.chunk_size,
+            recon_engine=args.recon_engine, recon_mode=args.recon_mode, recon_workers=args.recon_workers,
+            profile=profile,
+        ))
+    else:
+        asyncio.run(serve(args.ingest_engine, args.chunk_size, args.recon_engine, args.recon_mode, args.recon_workers,
+                          profile=profile))
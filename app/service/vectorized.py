@@ -0,0 +1,180 @@
+"""
+In-process NumPy reconciliation engine for large windows (end-of-day sweeps).
+
+Booked trades, counterparty trades and the currently open breaks for a
+trade_ts window are streamed out with binary COPY straight into NumPy arrays,
+matched by trade_id with a sorted-array join, checked against the match
+rules (app/service/rules.py) and diffed against the open breaks, so only breaks that appear, change reason or resolve are written back.
+The SQL engine in server._BREAKS_SQL stays the default and is still used for
+per-batch ingest; both produce the same breaks.
+
+NumPy is optional: `pip install numpy` to enable RECON_ENGINE=numpy.
+"""
+
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.service import rules as match_rules
+from app.service.bulk import _driver_connection
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+# reason codes produced by match(): 0 means the trade reconciles, n > 0 is
+# rules.reasons(rules)[n - 1], with MISSING first
+OK, MISSING = 0, 1
+# code stored for open breaks whose reason the current rules do not produce
+UNKNOWN = -1
+
+def available() -> bool:
+    return np is not None
+
+def require() -> None:
+    if np is None:
+        raise RuntimeError("the numpy reconciliation engine needs numpy installed (pip install numpy)")
+
+def latest_per_trade(cp_trade_id, cp_id):
+    """Indexes of the newest (highest id) counterparty row per trade_id, in trade_id order."""
+    order = np.lexsort((cp_id, cp_trade_id))
+    ids = cp_trade_id[order]
+    last = np.ones(len(ids), dtype=bool)
+    last[:-1] = ids[1:] != ids[:-1]
+    return order[last]
+
+def _failed(rule, t, c):
+    if match_rules.FIELDS[rule.field] == "text":
+        return c != t
+    tol = np.maximum(rule.abs_tol, rule.rel_tol * np.abs(t)) if rule.rel_tol else rule.abs_tol
+    if rule.comparator == "eq":
+        return np.abs(c - t) > tol
+    return (c - t if rule.comparator == "gt" else t - c) > tol
+
+def match(trade_id, booked: dict, cp_trade_id, cp_id, cp: dict, rules=match_rules.DEFAULT_RULES):
+    """Reason code per booked trade, aligned with trade_id.
+
+    `booked` and `cp` map each rule field to a column array. As in the SQL
+    engine a trade without counterparty row is MISSING, otherwise the rules are
+    applied in order to its latest counterparty row and the first failure wins.
+    """
+    latest = latest_per_trade(cp_trade_id, cp_id)
+    codes = np.full(len(trade_id), MISSING, dtype=np.int8)
+    if not len(latest):
+        return codes
+    cp_ids = cp_trade_id[latest]
+    pos = latest[np.minimum(np.searchsorted(cp_ids, trade_id), len(cp_ids) - 1)]
+    found = cp_trade_id[pos] == trade_id
+    codes[found] = OK
+    code = {reason: i + 1 for i, reason in enumerate(match_rules.reasons(rules))}
+    for rule in rules:
+        failed = (codes == OK) & _failed(rule, booked[rule.field], cp[rule.field][pos])
+        codes[failed] = code[rule.reason]
+    return codes
+
+def diff(trade_id, codes, open_id, open_code):
+    """Compare fresh codes with the open breaks of the same trades.
+
+    Returns (resolved trade_ids, trade_ids whose break is new or changed, their codes).
+    """
+    order = np.argsort(trade_id)
+    sorted_ids = trade_id[order]
+    previous = np.zeros(len(trade_id), dtype=np.int8)
+    if len(open_id) and len(sorted_ids):
+        pos = np.minimum(np.searchsorted(sorted_ids, open_id), len(sorted_ids) - 1)
+        known = sorted_ids[pos] == open_id
+        previous[order[pos[known]]] = open_code[known]
+    resolved = trade_id[(previous != OK) & (codes == OK)]
+    changed = (codes != OK) & (codes != previous)
+    return resolved, trade_id[changed], codes[changed]
+
+# ------------------- database side -------------------
+_COPY_HEADER = 19   # PGCOPY signature, flags and header-extension length
+_COPY_TRAILER = 2   # the -1 field count ending the stream
+
+async def _copy_columns(conn, query: str, args: list, types: list[str]) -> list:
+    """Run `query` as a binary COPY and return one array per column.
+
+    Every column must be NOT NULL and fixed width (int8 "i8", int4 "i4", float8
+    "f8"), so each row has the same layout and the whole stream parses as one
+    structured array.
+    """
+    chunks = []
+    async def sink(data):
+        chunks.append(data)
+    await conn.copy_from_query(query, *args, output=sink, format="binary")
+    buf = b"".join(chunks)
+    fields = [("n", ">i2")]
+    for i, t in enumerate(types):
+        fields += [(f"len{i}", ">i4"), (f"col{i}", ">" + t)]
+    row = np.dtype(fields)
+    count = (len(buf) - _COPY_HEADER - _COPY_TRAILER) // row.itemsize
+    rows = np.frombuffer(buf, dtype=row, count=count, offset=_COPY_HEADER)
+    return [rows[f"col{i}"].astype(t) for i, t in enumerate(types)]
+
+def _window(column: str, ts_lo: datetime | None, ts_hi: datetime | None) -> tuple[str, list]:
+    """WHERE clause on `column` for an optional [ts_lo, ts_hi] window, with $n args."""
+    clauses, args = [], []
+    if ts_lo is not None:
+        args.append(ts_lo)
+        clauses.append(f"{column} >= ${len(args)}")
+    if ts_hi is not None:
+        args.append(ts_hi)
+        clauses.append(f"{column} <= ${len(args)}")
+    return " AND ".join(clauses) or "TRUE", args
+
+async def load_window(session: AsyncSession, rules, ts_lo: datetime | None = None, ts_hi: datetime | None = None):
+    """Arrays for the window: booked (trade_id, {field: column}), counterparty
+    (trade_id, id, {field: column}) and open breaks (trade_id, code)."""
+    conn = await _driver_connection(session)
+    fields = match_rules.fields(rules)
+    columns = [match_rules.column_sql(f) for f in fields]
+    select = "".join(f", {sql}" for sql, _ in columns)
+    types = [t for _, t in columns]
+    where, args = _window("trade_ts", ts_lo, ts_hi)
+    trade_id, *booked = await _copy_columns(
+        conn, f"SELECT trade_id::int8{select} FROM trades WHERE {where}", args, ["i8", *types]
+    )
+    # counterparty rows are matched on trade_id alone, so their own trade_ts may differ
+    in_window = "TRUE" if not args else f"trade_id IN (SELECT trade_id FROM trades WHERE {where})"
+    cp_trade_id, cp_id, *cp = await _copy_columns(
+        conn,
+        f"SELECT trade_id::int8, id::int8{select} FROM counterparty_trades WHERE trade_id IS NOT NULL AND {in_window}",
+        args, ["i8", "i8", *types],
+    )
+    codes = " ".join(
+        f"WHEN {match_rules.sql_literal(r)} THEN {i + 1}" for i, r in enumerate(match_rules.reasons(rules))
+    )
+    open_breaks = await _copy_columns(
+        conn, f"SELECT trade_id::int8, (CASE reason {codes} ELSE {UNKNOWN} END)::int4 FROM breaks WHERE {in_window}",
+        args, ["i8", "i4"],
+    )
+    return (trade_id, dict(zip(fields, booked))), (cp_trade_id, cp_id, dict(zip(fields, cp))), open_breaks
+
+async def _apply(session: AsyncSession, reasons: list[str], resolved, changed_id, changed_code) -> None:
+    conn = await _driver_connection(session)
+    if len(resolved):
+        await conn.execute("DELETE FROM breaks WHERE trade_id = ANY($1::bigint[])", resolved.tolist())
+    if len(changed_id):
+        await conn.execute(
+            """INSERT INTO breaks(trade_id, reason)
+               SELECT * FROM unnest($1::bigint[], $2::text[])
+               ON CONFLICT(trade_id) DO UPDATE
+               SET reason      = EXCLUDED.reason,
+                   detected_ts = now()""",
+            changed_id.tolist(), [reasons[c - 1] for c in changed_code.tolist()],
+        )
+
+async def reconcile(
+    session: AsyncSession,
+    ts_lo: datetime | None = None,
+    ts_hi: datetime | None = None,
+    rules=match_rules.MATCH_RULES,
+) -> int:
+    """Reconcile every booked trade in the window in memory; returns the number of open breaks."""
+    require()
+    (trade_id, booked), counterparty, (open_id, open_code) = await load_window(session, rules, ts_lo, ts_hi)
+    codes = match(trade_id, booked, *counterparty, rules=rules)
+    await _apply(session, match_rules.reasons(rules), *diff(trade_id, codes, open_id, open_code))
+    return int(np.count_nonzero(codes))
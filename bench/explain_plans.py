@@ -0,0 +1,116 @@
+"""
+EXPLAIN-based check that the managed indexes change the reconciliation plans.
+
+Builds the schema in a scratch `bench_explain` schema, seeds it with synthetic
+trades, then EXPLAIN ANALYZEs the hot queries without and with the indexes
+from app/migrations.py. The scratch schema is dropped afterwards.
+
+    python -m bench.explain_plans --trades 200000
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app import migrations, models, partitions
+from app.db import engine
+
+SCHEMA = "bench_explain"
+
+SEED = [
+    """INSERT INTO trades(symbol, side, qty, price, trade_ts)
+       SELECT (ARRAY['AAPL','MSFT','GOOG','TSLA','NVDA','META'])[1 + i % 6],
+              CASE WHEN i % 2 = 0 THEN 'BUY' ELSE 'SELL' END,
+              10 + i % 990, 100 + i % 900,
+              now() - make_interval(secs => :n - i)
+       FROM generate_series(1, :n) AS i""",
+    # 90 % confirmed, every 10th confirmation with a qty tweak
+    """INSERT INTO counterparty_trades(trade_id, symbol, side, qty, price, trade_ts)
+       SELECT trade_id, symbol, side, qty + CASE WHEN trade_id % 10 = 3 THEN 5 ELSE 0 END, price, trade_ts
+       FROM trades WHERE trade_id % 10 <> 0""",
+    """INSERT INTO breaks(trade_id, reason)
+       SELECT trade_id, 'Missing Trade' FROM trades WHERE trade_id % 10 = 0""",
+]
+
+QUERIES = {
+    "scoped break detection (50 ids)": """
+        SELECT t.trade_id, cp.qty
+        FROM trades t LEFT JOIN counterparty_trades cp USING(trade_id)
+        WHERE t.trade_id = ANY(ARRAY(SELECT generate_series(:n - 49, :n)))""",
+    "breaks for one symbol": """
+        SELECT b.* FROM breaks b JOIN trades t ON t.trade_id = b.trade_id
+        WHERE t.symbol = 'TSLA'""",
+    "counterparty lookup for a batch": """
+        SELECT * FROM counterparty_trades
+        WHERE trade_id = ANY(ARRAY(SELECT generate_series(:n - 49, :n)))""",
+    "last hour of trades": """
+        SELECT count(*) FROM trades WHERE trade_ts >= now() - interval '1 hour'""",
+}
+
+def _scans(plan: dict) -> list[str]:
+    """Flatten a JSON plan into 'Node Type on relation/index' strings."""
+    node = plan["Node Type"]
+    target = plan.get("Index Name") or plan.get("Relation Name")
+    out = [f"{node} on {target}" if target else node] if "Scan" in node else []
+    for child in plan.get("Plans", []):
+        out += _scans(child)
+    return out
+
+async def _explain(conn, n: int) -> dict:
+    results = {}
+    for name, sql in QUERIES.items():
+        raw = (await conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), {"n": n})).scalar_one()
+        doc = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+        results[name] = (doc["Execution Time"], _scans(doc["Plan"]))
+    return results
+
+async def _drop_secondary_indexes(conn):
+    rows = await conn.execute(text(
+        """SELECT c.conrelid::regclass::text, c.conname
+           FROM pg_constraint c JOIN pg_namespace n ON n.oid = c.connamespace
+           WHERE n.nspname = :s AND c.contype = 'u' AND c.conparentid = 0"""), {"s": SCHEMA})
+    for table, name in rows.all():
+        await conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+    rows = await conn.execute(text(
+        """SELECT indexname FROM pg_indexes
+           WHERE schemaname = :s AND indexname NOT LIKE '%\\_pkey'
+             AND indexname NOT IN (SELECT inhrelid::regclass::text FROM pg_inherits)"""), {"s": SCHEMA})
+    for (name,) in rows.all():
+        await conn.execute(text(f'DROP INDEX "{name}"'))
+
+async def main(n: int):
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}"))
+        await conn.run_sync(models.Base.metadata.create_all)
+        # one partition per day of seeded trades (one trade per second up to now)
+        days = n // 86_400 + 1
+        start = datetime.now(timezone.utc).date() - timedelta(days=days)
+        await partitions.ensure_partitions(conn, days_ahead=days + 1, today=start)
+        await _drop_secondary_indexes(conn)
+        for sql in SEED:
+            await conn.execute(text(sql), {"n": n})
+        await conn.execute(text("ANALYZE"))
+        before = await _explain(conn, n)
+
+        await migrations.migrate(conn)
+        await conn.execute(text("ANALYZE"))
+        after = await _explain(conn, n)
+        await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+    print(f"{n} trades")
+    for name in QUERIES:
+        (t0, p0), (t1, p1) = before[name], after[name]
+        print(f"\n{name}: {t0:.2f} ms -> {t1:.2f} ms")
+        print(f"  without indexes: {', '.join(p0)}")
+        print(f"  with indexes:    {', '.join(p1)}")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trades", type=int, default=200_000)
+    asyncio.run(main(parser.parse_args().trades))
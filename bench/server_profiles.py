@@ -0,0 +1,97 @@
+"""
+Throughput and latency of the ingest and read RPCs under each server profile.
+
+Starts the server once per profile from app/service/profiles.py, with
+concurrent clients pipelining trades through IngestTradesStream while others
+poll ListPositions and ListBreaks. Trades are written to DATABASE_URL, so
+point it at a scratch database.
+
+    python -m bench.server_profiles --clients 8 --trades 4000
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import sys
+import time
+
+from app.service import profiles
+from app.service.client import ReconcileClient
+from app.utils.generator import random_trade
+
+def _pct(samples: list[float], q: float) -> float:
+    return statistics.quantiles(samples, n=100)[q - 1] * 1000 if len(samples) > 1 else 0.0
+
+async def _wait_ready(client: ReconcileClient, timeout: float = 30) -> None:
+    """Until every pooled channel gets an answer; one that failed during startup is in reconnect backoff."""
+    deadline = time.monotonic() + timeout
+    ok = 0
+    while ok < client.pool_size:
+        try:
+            await client.get_server_stats()
+            ok += 1
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            ok = 0
+            await asyncio.sleep(0.2)
+
+async def _run(profile: str, clients: int, trades: int, batch: int) -> dict:
+    server = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "app.service.server", "--profile", profile,
+        env=dict(os.environ, BREAK_SWEEP_INTERVAL="0"),
+        stdout=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        async with ReconcileClient(pool_size=clients) as client:
+            await _wait_ready(client)
+            work = [[random_trade() for _ in range(trades)] for _ in range(clients)]
+            batch_lat, read_lat = [], []
+            done = asyncio.Event()
+
+            async def ingest(rows):
+                t0 = time.perf_counter()
+                acks = await client.ingest_trades_stream(rows, batch)
+                batch_lat.append((time.perf_counter() - t0) / max(1, len(acks)))
+
+            async def read():
+                while not done.is_set():
+                    t0 = time.perf_counter()
+                    await client.list_positions()
+                    await client.list_breaks(page_size=500)
+                    read_lat.append(time.perf_counter() - t0)
+
+            readers = [asyncio.create_task(read()) for _ in range(max(1, clients // 2))]
+            t0 = time.perf_counter()
+            await asyncio.gather(*(ingest(rows) for rows in work))
+            elapsed = time.perf_counter() - t0
+            done.set()
+            await asyncio.gather(*readers)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        await server.wait()
+    return {
+        "trades/s": clients * trades / elapsed,
+        "batch ms (mean)": statistics.mean(batch_lat) * 1000,
+        "read p50 ms": _pct(read_lat, 50),
+        "read p99 ms": _pct(read_lat, 99),
+    }
+
+async def main(names: list[str], clients: int, trades: int, batch: int):
+    results = {name: await _run(name, clients, trades, batch) for name in names}
+    columns = list(next(iter(results.values())))
+    print(f"{clients} clients x {trades} trades, batches of {batch}")
+    print(f"{'profile':<12}" + "".join(f"{c:>17}" for c in columns))
+    for name, row in results.items():
+        print(f"{name:<12}" + "".join(f"{row[c]:>17.1f}" for c in columns))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", nargs="+", choices=sorted(profiles.PROFILES), default=list(profiles.PROFILES))
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--trades", type=int, default=4000, help="trades per client")
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.profiles, args.clients, args.trades, args.batch))
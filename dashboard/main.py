@@ -1,37 +1,183 @@
+import asyncio
+import os
+from urllib.parse import urlencode
+
+import grpc
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import select
 
-from app.db import async_session
-from app import models
 from app.service import client as grpc_client  # reuse the gRPC helper – avoids proto import issues
 
 app = FastAPI()
 app.mount("/static", StaticFiles(directory="dashboard/static"), name="static")
 templates = Jinja2Templates(directory="dashboard/templates")
 
-# ------------------ helper ------------------
-async def _stats():
-    async with async_session() as s:
-        trades = (await s.execute(select(models.Trade))).scalars().all()
-        breaks = (await s.execute(select(models.Break))).scalars().all()
-        pnl = sum(float(t.qty) * float(t.price) for t in trades if t.trade_id not in {b.trade_id for b in breaks})
-        return len(trades), len(breaks), round(pnl, 2)
+@app.on_event("shutdown")
+async def _close_grpc():
+    await relay.close()
+    await grpc_client.close(grace=5)
+
+# ------------------ keyset pages ------------------
+# All reads go through the server's List* / GetSummary RPCs, which answer from
+# a cache stamped with the data version (app/cache.py), so any number of
+# dashboard replicas share one query per change and hold no DB connections.
+# Tables are shown a page at a time; the last row of a page carries an HTMX
+# trigger that fetches the next one when scrolled into view, continuing from
+# the server's keyset page token.
+PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "50"))
+FILTERS = ("symbol", "side", "reason")
+
+# table -> (RPC, filters it supports, fixed query fields)
+TABLES = {
+    "trades": (grpc_client.list_trades, ("symbol", "side"), {}),
+    "counterparty": (grpc_client.list_counterparty, ("symbol", "side"), {}),
+    "breaks": (grpc_client.list_breaks, ("symbol", "reason"), {"newest_first": True}),
+    "positions": (grpc_client.list_positions, ("symbol",), {}),
+}
+
+async def _page(name: str, filters: dict, cursor: str = "") -> tuple[dict, int]:
+    """Template variables for one page of `name` (the rows and the URL of the next page, '' on the last)
+    and the data version they were read at."""
+    rpc, supported, fixed = TABLES[name]
+    query = {k: v for k, v in filters.items() if k in supported}
+    page = await rpc(PAGE_SIZE, cursor, **query, **fixed)
+    next_url = ""
+    if page.next_page_token:
+        next_url = f"/partial/{name}?" + urlencode({**filters, "cursor": page.next_page_token})
+    return {name: list(page.items), f"{name}_next": next_url}, page.version
+
+def _filters(request: Request) -> dict:
+    return {k: v for k in FILTERS if (v := request.query_params.get(k, "").strip())}
+
+def _etag(version: int) -> str:
+    return f'"v{version}"'
+
+# ------------------ live updates ------------------
+# /events relays the server's WatchChanges feed as server-sent events. An event
+# carries only the rows one commit changed, rendered with the row templates:
+# the tables prepend new trades, counterparty rows and breaks (unless filtered)
+# and replace changed positions in place, so a dashboard watching live ingest
+# costs O(changes) instead of a table reload. Tables changed in bulk get a
+# "refresh-<table>" event and reload their first page.
+SSE_KEEPALIVE = float(os.getenv("DASHBOARD_SSE_KEEPALIVE", "15"))  # seconds; keeps idle proxies from closing the stream
+SSE_QUEUE_SIZE = int(os.getenv("DASHBOARD_SSE_QUEUE_SIZE", "100"))  # changes a viewer may fall behind
+
+class ChangeRelay:
+    """One WatchChanges stream per dashboard process, fanned out to every /events viewer.
+
+    Open streams count against the server's max_concurrent_rpcs, so viewers
+    must not hold one each. The upstream stream is opened for the first viewer
+    and closed after the last. A viewer that falls SSE_QUEUE_SIZE changes
+    behind, or is watching when the stream breaks, is ended; its browser
+    reconnects and reloads.
+    """
+
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+
+    async def subscribe(self):
+        """Yield Change messages until the upstream stream ends or the caller stops iterating."""
+        queue: asyncio.Queue = asyncio.Queue(SSE_QUEUE_SIZE + 1)  # room for the end marker
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._relay())
+        try:
+            while (change := await queue.get()) is not None:
+                yield change
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def _end(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        queue.put_nowait(None)
+
+    async def _relay(self) -> None:
+        changes = grpc_client.watch_changes()
+        try:
+            async for change in changes:
+                for queue in list(self._subscribers):
+                    if queue.qsize() >= SSE_QUEUE_SIZE:
+                        self._end(queue)
+                    else:
+                        queue.put_nowait(change)
+        except grpc.RpcError:  # server gone
+            pass
+        finally:
+            for queue in list(self._subscribers):
+                self._end(queue)
+            await changes.aclose()
+
+relay = ChangeRelay()
+
+def _sse(event: str, data: str, event_id: int) -> str:
+    lines = "\n".join(f"data: {line}" for line in data.strip().splitlines())
+    return f"id: {event_id}\nevent: {event}\n{lines}\n\n"
+
+def _change_events(change) -> list[tuple[str, str]]:
+    """(event, html) pairs for one Change message."""
+    events = [(f"refresh-{name}", name) for name in change.refresh]
+    for name in ("trades", "counterparty", "breaks"):
+        rows = list(getattr(change, name))
+        if rows and name not in change.refresh:
+            events.append((name, templates.get_template(f"_{name}_rows.html").render({name: rows})))
+    if change.positions and "positions" not in change.refresh:
+        html = templates.get_template("_positions_rows.html").render(positions=list(change.positions), oob=True)
+        events.append(("positions", html))
+    return events
+
+@app.get("/events")
+async def events(request: Request):
+    # EventSource reconnects on its own; changes missed meanwhile are caught up by reloading
+    reconnect = request.headers.get("last-event-id") is not None
+
+    async def stream():
+        event_id = 0
+        yield "retry: 5000\nid: 0\n\n"  # sets Last-Event-ID, so even an early reconnect reloads
+        if reconnect:
+            for name in TABLES:
+                event_id += 1
+                yield _sse(f"refresh-{name}", name, event_id)
+        changes = relay.subscribe()
+        pending = asyncio.ensure_future(anext(changes))
+        try:
+            while True:
+                done, _ = await asyncio.wait({pending}, timeout=SSE_KEEPALIVE)
+                if not done:
+                    yield ": keepalive\n\n"
+                    continue
+                try:
+                    change = pending.result()
+                except StopAsyncIteration:  # relay ended this viewer; the browser reconnects
+                    return
+                pending = asyncio.ensure_future(anext(changes))
+                for event, html in _change_events(change):
+                    event_id += 1
+                    yield _sse(event, html, event_id)
+        finally:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+            await changes.aclose()
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 # ------------------ main dashboard ------------------
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
-    async with async_session() as s:
-        ctx = {
-            "request": request,
-            "trades": (await s.execute(select(models.Trade).order_by(models.Trade.trade_ts.desc()))).scalars().all(),
-            "counterparty": (await s.execute(select(models.CounterpartyTrade).order_by(models.CounterpartyTrade.trade_ts.desc()))).scalars().all(),
-            "breaks": (await s.execute(select(models.Break))).scalars().all(),
-            "positions": (await s.execute(select(models.Position))).scalars().all(),
-        }
-    ctx["total_trades"], ctx["total_breaks"], ctx["pnl"] = await _stats()
+    ctx = {"request": request, "filters": {}}
+    *pages, summary = await asyncio.gather(*(_page(name, {}) for name in TABLES), grpc_client.get_summary())
+    for page, _ in pages:
+        ctx.update(page)
+    ctx["total_trades"], ctx["total_breaks"], ctx["pnl"] = summary.trades, summary.breaks, round(summary.pnl, 2)
     return templates.TemplateResponse("index.html", ctx)
 
 # ------------------ ingest 50 trades ------------------
@@ -40,34 +186,59 @@ async def ingest():
     from app.utils.generator import random_trade
 
     trades = [random_trade() for _ in range(50)]
-    # call the same async helper used by the CLI – proto already compiled in that package
+    # call the same async helper used by the CLI – shares one long-lived channel across requests
     await grpc_client.ingest_trades(trades)
     return RedirectResponse("/", status_code=303)
 
 # ------------------ clear all tables ------------------
 @app.post("/clear")
 async def clear():
-    async with async_session() as s:
-        for tbl in [models.Break, models.Position, models.CounterpartyTrade, models.Trade]:
-            await s.execute(tbl.__table__.delete())
-        await s.commit()
+    await grpc_client.clear_all()
     return RedirectResponse("/", status_code=303)
 
+# ------------------ monitoring ------------------
+@app.get("/metrics/pool")
+async def metrics_pool():
+    """Pool of the server process that answered; the dashboard itself holds no DB connections."""
+    s = await grpc_client.get_server_stats()
+    return {"server": {
+        "worker_id": s.worker_id,
+        "size": s.pool_size,
+        "checked_out": s.pool_checked_out,
+        "checked_in": s.pool_checked_in,
+        "overflow": s.pool_overflow,
+        "waits": s.pool_waits,
+        "wait_avg_ms": s.pool_wait_avg_ms,
+        "wait_max_ms": s.pool_wait_max_ms,
+    }}
+
+@app.get("/metrics/cache")
+async def metrics_cache():
+    s = await grpc_client.get_server_stats()
+    return {"worker_id": s.worker_id, "entries": s.cache_entries, "hits": s.cache_hits,
+            "misses": s.cache_misses, "version": s.data_version}
+
 # ------------------ HTMX partials ------------------
 @app.get("/partial/{name}", response_class=HTMLResponse)
-async def partial(request: Request, name: str):
-    async with async_session() as s:
-        ctx = {"request": request}
-        if name == "trades":
-            ctx["trades"] = (await s.execute(select(models.Trade).order_by(models.Trade.trade_ts.desc()))).scalars().all()
-            return templates.TemplateResponse("_trades.html", ctx)
-        if name == "counterparty":
-            ctx["counterparty"] = (await s.execute(select(models.CounterpartyTrade).order_by(models.CounterpartyTrade.trade_ts.desc()))).scalars().all()
-            return templates.TemplateResponse("_counterparty.html", ctx)
-        if name == "breaks":
-            ctx["breaks"] = (await s.execute(select(models.Break))).scalars().all()
-            return templates.TemplateResponse("_breaks.html", ctx)
-        if name == "positions":
-            ctx["positions"] = (await s.execute(select(models.Position))).scalars().all()
-            return templates.TemplateResponse("_positions.html", ctx)
-    return HTMLResponse("Not found", status_code=404)
\ No newline at end of file
+async def partial(request: Request, name: str, cursor: str = ""):
+    """The whole table (filter change, refresh), or with a cursor just the next page's rows.
+
+    Responses carry the data version as ETag; the browser revalidates
+    (Cache-Control: no-cache) and gets a 304 while nothing has changed.
+    """
+    if name not in TABLES:
+        return HTMLResponse("Not found", status_code=404)
+    headers = {"Cache-Control": "no-cache"}
+    current = _etag(await grpc_client.get_data_version())
+    if request.headers.get("if-none-match") == current:
+        return Response(status_code=304, headers={**headers, "ETag": current})
+    filters = _filters(request)
+    try:
+        page, version = await _page(name, filters, cursor)
+    except grpc.RpcError as exc:
+        if exc.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            return HTMLResponse("Bad cursor", status_code=400)
+        raise
+    template = f"_{name}_rows.html" if cursor else f"_{name}.html"
+    html = templates.get_template(template).render({"filters": filters, **page})
+    return HTMLResponse(html, headers={**headers, "ETag": _etag(version)})
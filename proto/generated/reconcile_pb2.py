@@ -14,27 +14,59 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0freconcile.proto\x12\x05recon\"\x07\n\x05\x45mpty\"S\n\x05Trade\x12\x0e\n\x06symbol\x18\x01 \x01(\t\x12\x0c\n\x04side\x18\x02 \x01(\t\x12\x0b\n\x03qty\x18\x03 \x01(\x01\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x10\n\x08trade_ts\x18\x05 \x01(\t\"\"\n\x0eIngestResponse\x12\x10\n\x08inserted\x18\x01 \x01(\x05\">\n\x05\x42reak\x12\x10\n\x08trade_id\x18\x01 \x01(\x05\x12\x0e\n\x06reason\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65tected_ts\x18\x03 \x01(\t\"%\n\x06\x42reaks\x12\x1b\n\x05items\x18\x01 \x03(\x0b\x32\x0c.recon.Break\"9\n\x08Position\x12\x0e\n\x06symbol\x18\x01 \x01(\t\x12\x0f\n\x07net_qty\x18\x02 \x01(\x01\x12\x0c\n\x04vwap\x18\x03 \x01(\x01\"+\n\tPositions\x12\x1e\n\x05items\x18\x01 \x03(\x0b\x32\x0f.recon.Position2\xa3\x01\n\x10ReconcileService\x12\x35\n\x0cIngestTrades\x12\x0c.recon.Trade\x1a\x15.recon.IngestResponse(\x01\x12(\n\tGetBreaks\x12\x0c.recon.Empty\x1a\r.recon.Breaks\x12.\n\x0cGetPositions\x12\x0c.recon.Empty\x1a\x10.recon.Positionsb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0freconcile.proto\x12\x05recon\"\x07\n\x05\x45mpty\"h\n\x05Trade\x12\x0e\n\x06symbol\x18\x01 \x01(\t\x12\x0c\n\x04side\x18\x02 \x01(\t\x12\x0b\n\x03qty\x18\x03 \x01(\x01\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x10\n\x08trade_ts\x18\x05 \x01(\t\x12\x13\n\x0b\x65xternal_id\x18\x06 \x01(\t\"6\n\x0eIngestResponse\x12\x10\n\x08inserted\x18\x01 \x01(\x05\x12\x12\n\nduplicates\x18\x02 \x01(\x05\"\xc3\x01\n\nTradeBatch\x12\x11\n\tbatch_seq\x18\x01 \x01(\x04\x12\x1c\n\x06trades\x18\x02 \x03(\x0b\x32\x0c.recon.Trade\x12\x0f\n\x07symbols\x18\x03 \x03(\t\x12\x12\n\nsymbol_idx\x18\x04 \x03(\r\x12\x19\n\x04side\x18\x05 \x03(\x0e\x32\x0b.recon.Side\x12\x0b\n\x03qty\x18\x06 \x03(\x01\x12\r\n\x05price\x18\x07 \x03(\x01\x12\x13\n\x0btrade_ts_ns\x18\x08 \x03(\x03\x12\x13\n\x0b\x65xternal_id\x18\t \x03(\t\"U\n\tIngestAck\x12\x11\n\tbatch_seq\x18\x01 \x01(\x04\x12\x11\n\ttrade_ids\x18\x02 \x03(\x05\x12\x0e\n\x06\x62reaks\x18\x03 \x01(\x05\x12\x12\n\nduplicates\x18\x04 \x01(\x05\"\x96\x01\n\x11\x43ounterpartyBatch\x12\x10\n\x08trade_id\x18\x01 \x03(\x03\x12\x0f\n\x07symbols\x18\x02 \x03(\t\x12\x12\n\nsymbol_idx\x18\x03 \x03(\r\x12\x19\n\x04side\x18\x04 \x03(\x0e\x32\x0b.recon.Side\x12\x0b\n\x03qty\x18\x05 \x03(\x01\x12\r\n\x05price\x18\x06 \x03(\x01\x12\x13\n\x0btrade_ts_ns\x18\x07 \x03(\x03\"G\n\x0bLoadSummary\x12\x10\n\x08received\x18\x01 \x01(\x03\x12\x10\n\x08inserted\x18\x02 \x01(\x03\x12\x14\n\x0c\x66uzzy_linked\x18\x03 \x01(\x03\">\n\x05\x42reak\x12\x10\n\x08trade_id\x18\x01 \x01(\x05\x12\x0e\n\x06reason\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65tected_ts\x18\x03 \x01(\t\"%\n\x06\x42reaks\x12\x1b\n\x05items\x18\x01 \x03(\x0b\x32\x0c.recon.Break\"\x87\x01\n\nBreakQuery\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\x12\x0e\n\x06symbol\x18\x03 \x01(\t\x12\x0e\n\x06reason\x18\x04 \x01(\t\x12\r\n\x05since\x18\x05 \x01(\t\x12\r\n\x05until\x18\x06 \x01(\t\x12\x14\n\x0cnewest_first\x18\x07 \x01(\x08\"R\n\tBreakPage\x12\x1b\n\x05items\x18\x01 \x03(\x0b\x32\x0c.recon.Break\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x12\x0f\n\x07version\x18\x03 \x01(\x03\"9\n\x08Position\x12\x0e\n\x06symbol\x18\x01 \x01(\t\x12\x0f\n\x07net_qty\x18\x02 \x01(\x01\x12\x0c\n\x04vwap\x18\x03 \x01(\x01\"+\n\tPositions\x12\x1e\n\x05items\x18\x01 \x03(\x0b\x32\x0f.recon.Position\"F\n\rPositionQuery\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\x12\x0e\n\x06symbol\x18\x03 \x01(\t\"X\n\x0cPositionPage\x12\x1e\n\x05items\x18\x01 \x03(\x0b\x32\x0f.recon.Position\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x12\x0f\n\x07version\x18\x03 \x01(\x03\"\xf9\x03\n\x0bServerStats\x12\x11\n\tpool_size\x18\x01 \x01(\x05\x12\x18\n\x10pool_checked_out\x18\x02 \x01(\x05\x12\x17\n\x0fpool_checked_in\x18\x03 \x01(\x05\x12\x15\n\rpool_overflow\x18\x04 \x01(\x05\x12\x12\n\npool_waits\x18\x05 \x01(\x03\x12\x18\n\x10pool_wait_avg_ms\x18\x06 \x01(\x01\x12\x18\n\x10pool_wait_max_ms\x18\x07 \x01(\x01\x12\x19\n\x11recon_queue_depth\x18\x08 \x01(\x05\x12\x1c\n\x14recon_queue_capacity\x18\t \x01(\x05\x12\x14\n\x0crecon_rounds\x18\n \x01(\x03\x12\x15\n\rrecon_batches\x18\x0b \x01(\x03\x12\x16\n\x0erecon_failures\x18\x0c \x01(\x03\x12\x18\n\x10recon_max_lag_ms\x18\r \x01(\x01\x12\x15\n\ringest_rounds\x18\x0e \x01(\x03\x12\x15\n\ringest_chunks\x18\x0f \x01(\x03\x12\x11\n\tworker_id\x18\x10 \x01(\x05\x12\x15\n\rcache_entries\x18\x11 \x01(\x05\x12\x12\n\ncache_hits\x18\x12 \x01(\x03\x12\x14\n\x0c\x63\x61\x63he_misses\x18\x13 \x01(\x03\x12\x14\n\x0c\x64\x61ta_version\x18\x14 \x01(\x03\x12\x15\n\rrecon_dropped\x18\x15 \x01(\x03\"h\n\x08TradeRow\x12\x10\n\x08trade_id\x18\x01 \x01(\x05\x12\x0e\n\x06symbol\x18\x02 \x01(\t\x12\x0c\n\x04side\x18\x03 \x01(\t\x12\x0b\n\x03qty\x18\x04 \x01(\x01\x12\r\n\x05price\x18\x05 \x01(\x01\x12\x10\n\x08trade_ts\x18\x06 \x01(\t\"Q\n\nTradeQuery\x12\x11\n\tpage_size\x18\x01 \x01(\x05\x12\x12\n\npage_token\x18\x02 \x01(\t\x12\x0e\n\x06symbol\x18\x03 \x01(\t\x12\x0c\n\x04side\x18\x04 \x01(\t\"U\n\tTradePage\x12\x1e\n\x05items\x18\x01 \x03(\x0b\x32\x0f.recon.TradeRow\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x12\x0f\n\x07version\x18\x03 \x01(\x03\"G\n\x07Summary\x12\x0e\n\x06trades\x18\x01 \x01(\x03\x12\x0e\n\x06\x62reaks\x18\x02 \x01(\x03\x12\x0b\n\x03pnl\x18\x03 \x01(\x01\x12\x0f\n\x07version\x18\x04 \x01(\x03\"\x1e\n\x0b\x44\x61taVersion\x12\x0f\n\x07version\x18\x01 \x01(\x03\"\xa3\x01\n\x06\x43hange\x12\x1f\n\x06trades\x18\x01 \x03(\x0b\x32\x0f.recon.TradeRow\x12%\n\x0c\x63ounterparty\x18\x02 \x03(\x0b\x32\x0f.recon.TradeRow\x12\x1c\n\x06\x62reaks\x18\x03 \x03(\x0b\x32\x0c.recon.Break\x12\"\n\tpositions\x18\x04 \x03(\x0b\x32\x0f.recon.Position\x12\x0f\n\x07refresh\x18\x05 \x03(\t*/\n\x04Side\x12\x14\n\x10SIDE_UNSPECIFIED\x10\x00\x12\x07\n\x03\x42UY\x10\x01\x12\x08\n\x04SELL\x10\x02\x32\xdb\x06\n\x10ReconcileService\x12\x35\n\x0cIngestTrades\x12\x0c.recon.Trade\x1a\x15.recon.IngestResponse(\x01\x12=\n\x12IngestTradesStream\x12\x11.recon.TradeBatch\x1a\x10.recon.IngestAck(\x01\x30\x01\x12(\n\tGetBreaks\x12\x0c.recon.Empty\x1a\r.recon.Breaks\x12.\n\x0cGetPositions\x12\x0c.recon.Empty\x1a\x10.recon.Positions\x12\x31\n\nListBreaks\x12\x11.recon.BreakQuery\x1a\x10.recon.BreakPage\x12\x31\n\x0cStreamBreaks\x12\x11.recon.BreakQuery\x1a\x0c.recon.Break0\x01\x12:\n\rListPositions\x12\x14.recon.PositionQuery\x1a\x13.recon.PositionPage\x12\x31\n\nListTrades\x12\x11.recon.TradeQuery\x1a\x10.recon.TradePage\x12\x37\n\x10ListCounterparty\x12\x11.recon.TradeQuery\x1a\x10.recon.TradePage\x12*\n\nGetSummary\x12\x0c.recon.Empty\x1a\x0e.recon.Summary\x12\x32\n\x0eGetDataVersion\x12\x0c.recon.Empty\x1a\x12.recon.DataVersion\x12&\n\x08\x43learAll\x12\x0c.recon.Empty\x1a\x0c.recon.Empty\x12:\n\x0fStreamPositions\x12\x14.recon.PositionQuery\x1a\x0f.recon.Position0\x01\x12\x42\n\x10LoadCounterparty\x12\x18.recon.CounterpartyBatch\x1a\x12.recon.LoadSummary(\x01\x12\x32\n\x0eGetServerStats\x12\x0c.recon.Empty\x1a\x12.recon.ServerStats\x12-\n\x0cWatchChanges\x12\x0c.recon.Empty\x1a\r.recon.Change0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'reconcile_pb2', _globals)
 if _descriptor._USE_C_DESCRIPTORS == False:
   DESCRIPTOR._options = None
+  _globals['_SIDE']._serialized_start=2354
+  _globals['_SIDE']._serialized_end=2401
   _globals['_EMPTY']._serialized_start=26
   _globals['_EMPTY']._serialized_end=33
   _globals['_TRADE']._serialized_start=35
-  _globals['_TRADE']._serialized_end=118
-  _globals['_INGESTRESPONSE']._serialized_start=120
-  _globals['_INGESTRESPONSE']._serialized_end=154
-  _globals['_BREAK']._serialized_start=156
-  _globals['_BREAK']._serialized_end=218
-  _globals['_BREAKS']._serialized_start=220
-  _globals['_BREAKS']._serialized_end=257
-  _globals['_POSITION']._serialized_start=259
-  _globals['_POSITION']._serialized_end=316
-  _globals['_POSITIONS']._serialized_start=318
-  _globals['_POSITIONS']._serialized_end=361
-  _globals['_RECONCILESERVICE']._serialized_start=364
-  _globals['_RECONCILESERVICE']._serialized_end=527
+  _globals['_TRADE']._serialized_end=139
+  _globals['_INGESTRESPONSE']._serialized_start=141
+  _globals['_INGESTRESPONSE']._serialized_end=195
+  _globals['_TRADEBATCH']._serialized_start=198
+  _globals['_TRADEBATCH']._serialized_end=393
+  _globals['_INGESTACK']._serialized_start=395
+  _globals['_INGESTACK']._serialized_end=480
+  _globals['_COUNTERPARTYBATCH']._serialized_start=483
+  _globals['_COUNTERPARTYBATCH']._serialized_end=633
+  _globals['_LOADSUMMARY']._serialized_start=635
+  _globals['_LOADSUMMARY']._serialized_end=706
+  _globals['_BREAK']._serialized_start=708
+  _globals['_BREAK']._serialized_end=770
+  _globals['_BREAKS']._serialized_start=772
+  _globals['_BREAKS']._serialized_end=809
+  _globals['_BREAKQUERY']._serialized_start=812
+  _globals['_BREAKQUERY']._serialized_end=947
+  _globals['_BREAKPAGE']._serialized_start=949
+  _globals['_BREAKPAGE']._serialized_end=1031
+  _globals['_POSITION']._serialized_start=1033
+  _globals['_POSITION']._serialized_end=1090
+  _globals['_POSITIONS']._serialized_start=1092
+  _globals['_POSITIONS']._serialized_end=1135
+  _globals['_POSITIONQUERY']._serialized_start=1137
+  _globals['_POSITIONQUERY']._serialized_end=1207
+  _globals['_POSITIONPAGE']._serialized_start=1209
+  _globals['_POSITIONPAGE']._serialized_end=1297
+  _globals['_SERVERSTATS']._serialized_start=1300
+  _globals['_SERVERSTATS']._serialized_end=1805
+  _globals['_TRADEROW']._serialized_start=1807
+  _globals['_TRADEROW']._serialized_end=1911
+  _globals['_TRADEQUERY']._serialized_start=1913
+  _globals['_TRADEQUERY']._serialized_end=1994
+  _globals['_TRADEPAGE']._serialized_start=1996
+  _globals['_TRADEPAGE']._serialized_end=2081
+  _globals['_SUMMARY']._serialized_start=2083
+  _globals['_SUMMARY']._serialized_end=2154
+  _globals['_DATAVERSION']._serialized_start=2156
+  _globals['_DATAVERSION']._serialized_end=2186
+  _globals['_CHANGE']._serialized_start=2189
+  _globals['_CHANGE']._serialized_end=2352
+  _globals['_RECONCILESERVICE']._serialized_start=2404
+  _globals['_RECONCILESERVICE']._serialized_end=3263
 # @@protoc_insertion_point(module_scope)
@@ -19,6 +19,11 @@ class ReconcileServiceStub(object):
                 request_serializer=reconcile__pb2.Trade.SerializeToString,
                 response_deserializer=reconcile__pb2.IngestResponse.FromString,
                 )
+        self.IngestTradesStream = channel.stream_stream(
+                '/recon.ReconcileService/IngestTradesStream',
+                request_serializer=reconcile__pb2.TradeBatch.SerializeToString,
+                response_deserializer=reconcile__pb2.IngestAck.FromString,
+                )
         self.GetBreaks = channel.unary_unary(
                 '/recon.ReconcileService/GetBreaks',
                 request_serializer=reconcile__pb2.Empty.SerializeToString,
@@ -29,6 +34,66 @@ class ReconcileServiceStub(object):
                 request_serializer=reconcile__pb2.Empty.SerializeToString,
                 response_deserializer=reconcile__pb2.Positions.FromString,
                 )
+        self.ListBreaks = channel.unary_unary(
+                '/recon.ReconcileService/ListBreaks',
+                request_serializer=reconcile__pb2.BreakQuery.SerializeToString,
+                response_deserializer=reconcile__pb2.BreakPage.FromString,
+                )
+        self.StreamBreaks = channel.unary_stream(
+                '/recon.ReconcileService/StreamBreaks',
+                request_serializer=reconcile__pb2.BreakQuery.SerializeToString,
+                response_deserializer=reconcile__pb2.Break.FromString,
+                )
+        self.ListPositions = channel.unary_unary(
+                '/recon.ReconcileService/ListPositions',
+                request_serializer=reconcile__pb2.PositionQuery.SerializeToString,
+                response_deserializer=reconcile__pb2.PositionPage.FromString,
+                )
+        self.ListTrades = channel.unary_unary(
+                '/recon.ReconcileService/ListTrades',
+                request_serializer=reconcile__pb2.TradeQuery.SerializeToString,
+                response_deserializer=reconcile__pb2.TradePage.FromString,
+                )
+        self.ListCounterparty = channel.unary_unary(
+                '/recon.ReconcileService/ListCounterparty',
+                request_serializer=reconcile__pb2.TradeQuery.SerializeToString,
+                response_deserializer=reconcile__pb2.TradePage.FromString,
+                )
+        self.GetSummary = channel.unary_unary(
+                '/recon.ReconcileService/GetSummary',
+                request_serializer=reconcile__pb2.Empty.SerializeToString,
+                response_deserializer=reconcile__pb2.Summary.FromString,
+                )
+        self.GetDataVersion = channel.unary_unary(
+                '/recon.ReconcileService/GetDataVersion',
+                request_serializer=reconcile__pb2.Empty.SerializeToString,
+                response_deserializer=reconcile__pb2.DataVersion.FromString,
+                )
+        self.ClearAll = channel.unary_unary(
+                '/recon.ReconcileService/ClearAll',
+                request_serializer=reconcile__pb2.Empty.SerializeToString,
+                response_deserializer=reconcile__pb2.Empty.FromString,
+                )
+        self.StreamPositions = channel.unary_stream(
+                '/recon.ReconcileService/StreamPositions',
+                request_serializer=reconcile__pb2.PositionQuery.SerializeToString,
+                response_deserializer=reconcile__pb2.Position.FromString,
+                )
+        self.LoadCounterparty = channel.stream_unary(
+                '/recon.ReconcileService/LoadCounterparty',
+                request_serializer=reconcile__pb2.CounterpartyBatch.SerializeToString,
+                response_deserializer=reconcile__pb2.LoadSummary.FromString,
+                )
+        self.GetServerStats = channel.unary_unary(
+                '/recon.ReconcileService/GetServerStats',
+                request_serializer=reconcile__pb2.Empty.SerializeToString,
+                response_deserializer=reconcile__pb2.ServerStats.FromString,
+                )
+        self.WatchChanges = channel.unary_stream(
+                '/recon.ReconcileService/WatchChanges',
+                request_serializer=reconcile__pb2.Empty.SerializeToString,
+                response_deserializer=reconcile__pb2.Change.FromString,
+                )
 
 
 class ReconcileServiceServicer(object):
@@ -40,18 +105,99 @@ class ReconcileServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
-    def GetBreaks(self, request, context):
+    def IngestTradesStream(self, request_iterator, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetBreaks(self, request, context):
+        """Get* return every row in one message; prefer the List*/Stream* variants.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetPositions(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ListBreaks(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamBreaks(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListPositions(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListTrades(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListCounterparty(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetSummary(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetDataVersion(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ClearAll(self, request, context):
+        """delete every trade, confirmation, break and position
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamPositions(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def LoadCounterparty(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetServerStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchChanges(self, request, context):
+        """Live feed of committed changes from every server process; runs until cancelled.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ReconcileServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -60,6 +206,11 @@ def add_ReconcileServiceServicer_to_server(servicer, server):
                     request_deserializer=reconcile__pb2.Trade.FromString,
                     response_serializer=reconcile__pb2.IngestResponse.SerializeToString,
             ),
+            'IngestTradesStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.IngestTradesStream,
+                    request_deserializer=reconcile__pb2.TradeBatch.FromString,
+                    response_serializer=reconcile__pb2.IngestAck.SerializeToString,
+            ),
             'GetBreaks': grpc.unary_unary_rpc_method_handler(
                     servicer.GetBreaks,
                     request_deserializer=reconcile__pb2.Empty.FromString,
@@ -70,6 +221,66 @@ def add_ReconcileServiceServicer_to_server(servicer, server):
                     request_deserializer=reconcile__pb2.Empty.FromString,
                     response_serializer=reconcile__pb2.Positions.SerializeToString,
             ),
+            'ListBreaks': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListBreaks,
+                    request_deserializer=reconcile__pb2.BreakQuery.FromString,
+                    response_serializer=reconcile__pb2.BreakPage.SerializeToString,
+            ),
+            'StreamBreaks': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamBreaks,
+                    request_deserializer=reconcile__pb2.BreakQuery.FromString,
+                    response_serializer=reconcile__pb2.Break.SerializeToString,
+            ),
+            'ListPositions': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListPositions,
+                    request_deserializer=reconcile__pb2.PositionQuery.FromString,
+                    response_serializer=reconcile__pb2.PositionPage.SerializeToString,
+            ),
+            'ListTrades': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListTrades,
+                    request_deserializer=reconcile__pb2.TradeQuery.FromString,
+                    response_serializer=reconcile__pb2.TradePage.SerializeToString,
+            ),
+            'ListCounterparty': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListCounterparty,
+                    request_deserializer=reconcile__pb2.TradeQuery.FromString,
+                    response_serializer=reconcile__pb2.TradePage.SerializeToString,
+            ),
+            'GetSummary': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetSummary,
+                    request_deserializer=reconcile__pb2.Empty.FromString,
+                    response_serializer=reconcile__pb2.Summary.SerializeToString,
+            ),
+            'GetDataVersion': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetDataVersion,
+                    request_deserializer=reconcile__pb2.Empty.FromString,
+                    response_serializer=reconcile__pb2.DataVersion.SerializeToString,
+            ),
+            'ClearAll': grpc.unary_unary_rpc_method_handler(
+                    servicer.ClearAll,
+                    request_deserializer=reconcile__pb2.Empty.FromString,
+                    response_serializer=reconcile__pb2.Empty.SerializeToString,
+            ),
+            'StreamPositions': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamPositions,
+                    request_deserializer=reconcile__pb2.PositionQuery.FromString,
+                    response_serializer=reconcile__pb2.Position.SerializeToString,
+            ),
+            'LoadCounterparty': grpc.stream_unary_rpc_method_handler(
+                    servicer.LoadCounterparty,
+                    request_deserializer=reconcile__pb2.CounterpartyBatch.FromString,
+                    response_serializer=reconcile__pb2.LoadSummary.SerializeToString,
+            ),
+            'GetServerStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetServerStats,
+                    request_deserializer=reconcile__pb2.Empty.FromString,
+                    response_serializer=reconcile__pb2.ServerStats.SerializeToString,
+            ),
+            'WatchChanges': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchChanges,
+                    request_deserializer=reconcile__pb2.Empty.FromString,
+                    response_serializer=reconcile__pb2.Change.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'recon.ReconcileService', rpc_method_handlers)
@@ -97,6 +308,23 @@ class ReconcileService(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def IngestTradesStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/recon.ReconcileService/IngestTradesStream',
+            reconcile__pb2.TradeBatch.SerializeToString,
+            reconcile__pb2.IngestAck.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def GetBreaks(request,
             target,
@@ -130,3 +358,207 @@ class ReconcileService(object):
             reconcile__pb2.Positions.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListBreaks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/recon.ReconcileService/ListBreaks',
+            reconcile__pb2.BreakQuery.SerializeToString,
+            reconcile__pb2.BreakPage.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamBreaks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/recon.ReconcileService/StreamBreaks',
+            reconcile__pb2.BreakQuery.SerializeToString,
+            reconcile__pb2.Break.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListPositions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/recon.ReconcileService/ListPositions',
+            reconcile__pb2.PositionQuery.SerializeToString,
+            reconcile__pb2.PositionPage.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListTrades(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/recon.ReconcileService/ListTrades',
+            reconcile__pb2.TradeQuery.SerializeToString,
+            reconcile__pb2.TradePage.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListCounterparty(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/recon.ReconcileService/ListCounterparty',
+            reconcile__pb2.TradeQuery.SerializeToString,
+            reconcile__pb2.TradePage.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetSummary(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/recon.ReconcileService/GetSummary',
+            reconcile__pb2.Empty.SerializeToString,
+            reconcile__pb2.Summary.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetDataVersion(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/recon.ReconcileService/GetDataVersion',
+            reconcile__pb2.Empty.SerializeToString,
+            reconcile__pb2.DataVersion.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ClearAll(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/recon.ReconcileService/ClearAll',
+            reconcile__pb2.Empty.SerializeToString,
+            reconcile__pb2.Empty.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamPositions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/recon.ReconcileService/StreamPositions',
+            reconcile__pb2.PositionQuery.SerializeToString,
+            reconcile__pb2.Position.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def LoadCounterparty(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/recon.ReconcileService/LoadCounterparty',
+            reconcile__pb2.CounterpartyBatch.SerializeToString,
+            reconcile__pb2.LoadSummary.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetServerStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/recon.ReconcileService/GetServerStats',
+            reconcile__pb2.Empty.SerializeToString,
+            reconcile__pb2.ServerStats.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def WatchChanges(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/recon.ReconcileService/WatchChanges',
+            reconcile__pb2.Empty.SerializeToString,
+            reconcile__pb2.Change.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
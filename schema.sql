@@ -1,35 +1,67 @@
+-- trades and counterparty_trades are range-partitioned by trade date (UTC days,
+-- <table>_pYYYYMMDD); the server creates upcoming days and retires old ones, see
+-- app/partitions.py. Keys on partitioned tables must include trade_ts.
+
 -- Trades executed in the market
 CREATE TABLE IF NOT EXISTS trades (
-    trade_id    SERIAL PRIMARY KEY,
+    trade_id    SERIAL,
     symbol      TEXT        NOT NULL,
     side        TEXT        CHECK (side IN ('BUY','SELL')),
     qty         NUMERIC     NOT NULL,
     price       NUMERIC     NOT NULL,
-    trade_ts    TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
+    trade_ts    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    external_id TEXT,  -- optional client key; re-sent trades are skipped
+    PRIMARY KEY (trade_id, trade_ts)
+) PARTITION BY RANGE (trade_ts);
+CREATE TABLE IF NOT EXISTS trades_default PARTITION OF trades DEFAULT;
+CREATE INDEX IF NOT EXISTS ix_trades_symbol ON trades(symbol);
+CREATE INDEX IF NOT EXISTS ix_trades_trade_ts_brin ON trades USING brin(trade_ts);
+CREATE INDEX IF NOT EXISTS ix_trades_trade_ts_trade_id ON trades(trade_ts, trade_id);  -- dashboard keyset pages
+ALTER TABLE trades ADD COLUMN IF NOT EXISTS external_id TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS trades_external_id_key ON trades(external_id, trade_ts);
 
 -- Counter-party view of trades sent by custodian
 CREATE TABLE IF NOT EXISTS counterparty_trades (
-    id        SERIAL PRIMARY KEY,
-    trade_id  INT REFERENCES trades(trade_id),
+    id        SERIAL,
+    trade_id  INT,
     symbol    TEXT        NOT NULL,
     side      TEXT        CHECK (side IN ('BUY','SELL')),
     qty       NUMERIC     NOT NULL,
     price     NUMERIC     NOT NULL,
-    trade_ts  TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
+    trade_ts  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    match_confidence NUMERIC,  -- set when trade_id was filled in by fuzzy matching
+    PRIMARY KEY (id, trade_ts),
+    CONSTRAINT counterparty_trades_trade_id_key UNIQUE (trade_id, trade_ts)  -- one confirmation per trade and trade_ts
+) PARTITION BY RANGE (trade_ts);
+CREATE TABLE IF NOT EXISTS counterparty_trades_default PARTITION OF counterparty_trades DEFAULT;
+CREATE INDEX IF NOT EXISTS ix_counterparty_trades_trade_ts_brin ON counterparty_trades USING brin(trade_ts);
+CREATE INDEX IF NOT EXISTS ix_counterparty_trades_trade_ts_id ON counterparty_trades(trade_ts, id);
+ALTER TABLE counterparty_trades ADD COLUMN IF NOT EXISTS match_confidence NUMERIC;
 
 -- Breaks detected during reconciliation
 CREATE TABLE IF NOT EXISTS breaks (
     break_id    SERIAL PRIMARY KEY,
-    trade_id    INT REFERENCES trades(trade_id),
+    trade_id    INT UNIQUE,  -- one open break per trade
     reason      TEXT        NOT NULL,
     detected_ts TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
 -- Net positions per symbol
 CREATE TABLE IF NOT EXISTS positions (
-    symbol  TEXT PRIMARY KEY,
-    net_qty NUMERIC NOT NULL,
-    vwap    NUMERIC NOT NULL
+    symbol    TEXT PRIMARY KEY,
+    net_qty   NUMERIC NOT NULL,
+    vwap      NUMERIC NOT NULL,
+    gross_qty NUMERIC NOT NULL DEFAULT 0,   -- SUM(qty), vwap denominator
+    notional  NUMERIC NOT NULL DEFAULT 0,   -- SUM(price * qty), vwap numerator
+    trade_count BIGINT NOT NULL DEFAULT 0   -- COUNT(*), dashboard totals
+);
+ALTER TABLE positions ADD COLUMN IF NOT EXISTS gross_qty NUMERIC NOT NULL DEFAULT 0;
+ALTER TABLE positions ADD COLUMN IF NOT EXISTS notional  NUMERIC NOT NULL DEFAULT 0;
+ALTER TABLE positions ADD COLUMN IF NOT EXISTS trade_count BIGINT NOT NULL DEFAULT 0;  -- then run --full-rebuild
+
+-- Bumped by every transaction that changes the tables above; readers cache per version
+CREATE TABLE IF NOT EXISTS data_version (
+    id      INT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
 );
+INSERT INTO data_version(id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,46 @@
+"""
+Fixtures for tests that need Postgres.
+
+Those tests run only when TEST_DATABASE_URL points at a throwaway database,
+e.g. postgresql+asyncpg://reconciler@127.0.0.1:5432/reconciler_test; its
+public schema is dropped and recreated for every such test, and the partition
+archive schema dropped. Without it they are skipped.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL  # before app.db creates its engine
+
+
+@pytest.fixture
+def run_db():
+    """run_db(main) awaits main() on a freshly initialised schema and returns its result."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("set TEST_DATABASE_URL to a throwaway Postgres database")
+    from sqlalchemy import text
+
+    from app import partitions
+    from app.db import engine
+    from app.service import server
+
+    def run(main):
+        async def wrapper():
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(text("DROP SCHEMA public CASCADE"))
+                    await conn.execute(text("CREATE SCHEMA public"))
+                    if partitions.PARTITION_ARCHIVE_SCHEMA:
+                        await conn.execute(text(f'DROP SCHEMA IF EXISTS "{partitions.PARTITION_ARCHIVE_SCHEMA}" CASCADE'))
+                await server._init_db()
+                return await main()
+            finally:
+                await engine.dispose()  # pooled connections belong to this event loop
+
+        return asyncio.run(wrapper())
+
+    return run
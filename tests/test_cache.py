@@ -0,0 +1,57 @@
+import asyncio
+
+from app.cache import VersionedCache
+
+
+class _Source:
+    def __init__(self):
+        self.version = 1
+        self.reads = 0
+        self.queries = 0
+
+    async def read_version(self):
+        self.reads += 1
+        return self.version
+
+    async def query(self):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        return f"rows at {self.version}"
+
+
+def test_value_is_reused_until_the_version_moves():
+    src = _Source()
+
+    async def main():
+        cache = VersionedCache(src.read_version, ttl=0)
+        first = await cache.get("trades", src.query)
+        again = await cache.get("trades", src.query)
+        src.version = 2
+        moved = await cache.get("trades", src.query)
+        return first, again, moved
+
+    assert asyncio.run(main()) == (("rows at 1", 1), ("rows at 1", 1), ("rows at 2", 2))
+    assert src.queries == 2
+
+
+def test_concurrent_misses_share_one_query_and_version_read():
+    src = _Source()
+
+    async def main():
+        cache = VersionedCache(src.read_version, ttl=60)
+        return await asyncio.gather(*(cache.get("stats", src.query) for _ in range(10)))
+
+    assert set(asyncio.run(main())) == {("rows at 1", 1)}
+    assert (src.queries, src.reads) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted():
+    src = _Source()
+
+    async def main():
+        cache = VersionedCache(src.read_version, ttl=60, max_entries=2)
+        for key in ("a", "b", "a", "c", "a", "b"):
+            await cache.get(key, src.query)
+
+    asyncio.run(main())
+    assert src.queries == 4  # a, b, c, then b again after c evicted it
@@ -0,0 +1,40 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from app.service import changes
+from app.service.changes import ChangeFeed, notice
+
+T0 = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def test_notice_keeps_newest_rows():
+    body = json.loads(notice(trades=range(200), ts=(T0, T0), breaks={5, 3}, symbols=[], refresh=[]))
+    assert body["trades"] == list(range(200 - changes.WATCH_MAX_ROWS, 200))
+    assert body["breaks"] == [3, 5]
+    assert datetime.fromisoformat(body["ts"][0]) == T0
+    assert "symbols" not in body and "refresh" not in body
+
+
+def test_notice_refreshes_positions_when_too_many_symbols():
+    symbols = [f"S{i}" for i in range(changes.WATCH_MAX_ROWS + 1)]
+    body = json.loads(notice(symbols=symbols, refresh=["breaks"]))
+    assert "symbols" not in body
+    assert body["refresh"] == ["breaks", "positions"]
+
+
+def test_slow_subscriber_gets_a_full_refresh():
+    async def load(change):
+        return change
+
+    async def main():
+        feed = ChangeFeed("unused", load)
+        slow, fast = asyncio.Queue(2), asyncio.Queue(10)
+        feed._subscribers |= {slow, fast}
+        for i in range(3):
+            await feed._publish({"trades": [i]})
+        return [slow.get_nowait() for _ in range(slow.qsize())], fast.qsize()
+
+    slow, fast = asyncio.run(main())
+    assert slow == [{"refresh": list(changes.TABLES)}]
+    assert fast == 3
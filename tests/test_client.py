@@ -0,0 +1,51 @@
+import asyncio
+
+import grpc
+import pytest
+
+from app.service.client import ReconcileClient, pb2
+
+
+class _FlakyStub:
+    """Commits every batch; the first stream then breaks before acking anything."""
+
+    def __init__(self):
+        self.sent = []
+
+    def IngestTradesStream(self, batches):
+        async def acks():
+            async for batch in batches:
+                self.sent.append(list(batch.external_id))
+                if len(self.sent) == 1:
+                    raise grpc.aio.AioRpcError(grpc.StatusCode.UNAVAILABLE, None, None, "connection reset")
+                yield pb2.IngestAck(batch_seq=batch.batch_seq)
+        return acks()
+
+
+TRADES = [
+    {"symbol": "AAPL", "side": "BUY", "qty": 1, "price": 100.0, "trade_ts": "2024-05-01T12:00:00"},
+    {"symbol": "AAPL", "side": "SELL", "qty": 1, "price": 100.0, "trade_ts": "2024-05-01T12:00:00",
+     "external_id": "mine"},
+]
+
+
+def test_unkeyed_batches_are_not_resent():
+    client, stub = ReconcileClient(), _FlakyStub()
+    client._stub = lambda: stub
+
+    with pytest.raises(grpc.aio.AioRpcError):
+        asyncio.run(client.ingest_trades_stream(TRADES, batch_size=2))
+    assert stub.sent == [["", "mine"]]
+
+
+def test_resent_batches_carry_the_same_external_ids():
+    trades = [dict(t) for t in TRADES]
+    client, stub = ReconcileClient(), _FlakyStub()
+    client._stub = lambda: stub
+
+    acks = asyncio.run(client.ingest_trades_stream(trades, batch_size=2, key_trades=True))
+    assert len(acks) == 1
+    first, retry = stub.sent
+    assert first == retry
+    assert first[0] and first[1] == "mine"
+    assert "external_id" not in trades[0]  # the caller's dicts are left alone
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.service import codec
+
+
+def _batch(**fields):
+    return SimpleNamespace(**{"trades": [], "external_id": [], **fields})
+
+
+def test_columnar_roundtrip():
+    trades = [
+        {"symbol": "AAPL", "side": "BUY", "qty": 10.5, "price": 190.25, "trade_ts": "2024-05-01T12:00:00.123456+00:00"},
+        {"symbol": "MSFT", "side": "SELL", "qty": 3.0, "price": 410.0, "trade_ts": "2024-05-01T12:00:01+00:00"},
+        {"symbol": "AAPL", "side": "SELL", "qty": 1.0, "price": 191.0, "trade_ts": "2024-05-01T12:00:02+00:00"},
+    ]
+    fields = codec.columnar_fields(trades)
+    assert fields["symbols"] == ["AAPL", "MSFT"]
+    assert fields["symbol_idx"] == [0, 1, 0]
+
+    rows = codec.decode_batch(_batch(**fields))
+    assert rows == [
+        (t["symbol"], t["side"], t["qty"], t["price"], datetime.fromisoformat(t["trade_ts"]), None)
+        for t in trades
+    ]
+    assert "external_id" not in fields
+
+
+def test_external_id_column():
+    trades = [
+        {"symbol": "AAPL", "side": "BUY", "qty": 1.0, "price": 1.0, "trade_ts": "2024-05-01T00:00:00+00:00", "external_id": "A-1"},
+        {"symbol": "AAPL", "side": "SELL", "qty": 1.0, "price": 1.0, "trade_ts": "2024-05-01T00:00:01+00:00"},
+    ]
+    fields = codec.columnar_fields(trades)
+    assert fields["external_id"] == ["A-1", ""]
+    assert [r[5] for r in codec.decode_batch(_batch(**fields))] == ["A-1", None]
+
+
+def test_epoch_ns_keeps_microseconds():
+    ts = datetime(2024, 5, 1, 12, 0, 0, 654321, tzinfo=timezone.utc)
+    assert codec.from_epoch_ns(codec.to_epoch_ns(ts)) == ts
+
+
+def test_ragged_columns_rejected():
+    fields = codec.columnar_fields([{"symbol": "AAPL", "side": "BUY", "qty": 1.0, "price": 1.0, "trade_ts": "2024-05-01T00:00:00+00:00"}])
+    fields["qty"] = []
+    with pytest.raises(ValueError):
+        codec.decode_batch(_batch(**fields))
+
+
+def test_row_form_timestamps_are_utc_aware():
+    trade = SimpleNamespace(symbol="AAPL", side="BUY", qty=1.0, price=1.0, trade_ts="2024-05-01T12:00:00", external_id="")
+    rows = codec.decode_batch(_batch(trades=[trade]))
+    assert rows[0][4] == datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
@@ -0,0 +1,51 @@
+import gzip
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.service import codec, feeds
+
+TS = datetime(2024, 5, 1, 12, 0, 1, 500000, tzinfo=timezone.utc)
+
+
+def test_csv_chunks_and_normalization(tmp_path):
+    path = tmp_path / "custodian.csv"
+    path.write_text(
+        "trade_id,symbol,side,qty,price,trade_ts\n"
+        "17,AAPL,B,10,190.5,2024-05-01T12:00:01.5\n"
+        ",MSFT,sell,3,410,2024-05-01T12:00:01.5+00:00\n"
+        "18,TSLA,BUY,1,170,2024-05-01T12:00:01.5Z\n"
+    )
+    chunks = list(feeds.read_chunks(path, chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert chunks[0] == [(17, "AAPL", "BUY", 10.0, 190.5, TS), (None, "MSFT", "SELL", 3.0, 410.0, TS)]
+
+
+def test_csv_errors_name_the_line(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("symbol,side,qty,price,trade_ts\nAAPL,HOLD,1,1,2024-05-01T00:00:00\n")
+    with pytest.raises(ValueError, match="line 2"):
+        list(feeds.read_chunks(path))
+    path.write_text("symbol,qty\n")
+    with pytest.raises(ValueError, match="missing"):
+        list(feeds.read_chunks(path))
+
+
+def test_fix_drop_copy_gz(tmp_path):
+    path = tmp_path / "dropcopy.fix.gz"
+    with gzip.open(path, "wt") as f:
+        f.write("8=FIX.4.4|35=8|150=F|11=42|55=AAPL|54=1|32=10|31=190.5|60=20240501-12:00:01.500\n")
+        f.write("8=FIX.4.4|35=8|150=0|11=43|55=AAPL|54=1|38=10|44=190.5|60=20240501-12:00:01\n")  # new order ack
+        f.write("8=FIX.4.4\x0135=8\x0111=ABC-1\x0155=MSFT\x0154=2\x0132=3\x0131=410\x0160=20240501-12:00:01.5\x01\n")
+        f.write("8=FIX.4.4|35=0|\n")  # heartbeat
+    assert feeds.detect_format(path) == "fix"
+    assert list(feeds.read_chunks(path)) == [[
+        (42, "AAPL", "BUY", 10.0, 190.5, TS),
+        (None, "MSFT", "SELL", 3.0, 410.0, TS),
+    ]]
+
+
+def test_counterparty_batch_roundtrip():
+    rows = [(17, "AAPL", "BUY", 10.0, 190.5, TS), (None, "MSFT", "SELL", 3.0, 410.0, TS)]
+    assert codec.decode_counterparty(SimpleNamespace(**codec.counterparty_fields(rows))) == rows
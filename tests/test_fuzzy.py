@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from app.service import fuzzy
+
+T0 = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+def test_links_best_candidate_within_tolerances():
+    booked = [
+        (1, "AAPL", "BUY", 100, 190.00, _at(0)),
+        (2, "AAPL", "BUY", 100, 190.00, _at(30)),
+        (3, "AAPL", "SELL", 100, 190.00, _at(1)),   # wrong side
+        (4, "MSFT", "BUY", 100, 190.00, _at(1)),    # wrong symbol
+    ]
+    counterparty = [(10, "AAPL", "BUY", 100, 190.01, _at(28))]
+    links = fuzzy.match(booked, counterparty, ts_tol=60, price_tol=0.001)
+    assert [(l.cp_id, l.trade_id) for l in links] == [(10, 2)]
+    assert 0.9 < links[0].confidence <= 1
+
+
+def test_assignment_is_one_to_one():
+    booked = [(1, "AAPL", "BUY", 100, 190.0, _at(0)), (2, "AAPL", "BUY", 100, 190.0, _at(10))]
+    counterparty = [(10, "AAPL", "BUY", 100, 190.0, _at(1)), (11, "AAPL", "BUY", 100, 190.0, _at(2))]
+    links = fuzzy.match(booked, counterparty, ts_tol=60, price_tol=0.001)
+    assert sorted((l.cp_id, l.trade_id) for l in links) == [(10, 1), (11, 2)]
+
+
+def test_rejects_outside_tolerance_and_crosses_midnight():
+    midnight = datetime(2024, 5, 2, tzinfo=timezone.utc)
+    booked = [
+        (1, "AAPL", "BUY", 100, 190.0, midnight - timedelta(seconds=5)),
+        (2, "AAPL", "BUY", 100, 200.0, _at(0)),
+    ]
+    counterparty = [
+        (10, "AAPL", "BUY", 100, 190.0, midnight + timedelta(seconds=5)),
+        (11, "AAPL", "BUY", 100, 190.0, _at(0)),  # price 5 % off
+    ]
+    links = fuzzy.match(booked, counterparty, ts_tol=60, price_tol=0.001)
+    assert [(l.cp_id, l.trade_id) for l in links] == [(10, 1)]
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.service.pipeline import ReconPipeline
+
+T0 = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+class _Session:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def commit(self):
+        pass
+
+
+def test_batches_are_coalesced():
+    calls = []
+
+    async def handler(session, trade_ids, ts_range):
+        calls.append((trade_ids, ts_range))
+        return 0
+
+    async def main():
+        recon = ReconPipeline(handler, _Session, workers=1, max_depth=10, coalesce=4)
+        for i in range(5):
+            await recon.submit([2 * i, 2 * i + 1], (T0 + timedelta(seconds=i), T0 + timedelta(seconds=i)))
+        recon.start()
+        await recon.stop()
+        return recon.stats()
+
+    stats = asyncio.run(main())
+    assert [ids for ids, _ in calls] == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert calls[0][1] == (T0, T0 + timedelta(seconds=1))
+    assert (stats["rounds"], stats["jobs"], stats["trades"], stats["depth"]) == (3, 5, 10, 0)
+
+
+def test_failed_round_keeps_worker_alive():
+    seen = []
+
+    async def handler(session, trade_ids, ts_range):
+        seen.extend(trade_ids)
+        if trade_ids == [1]:
+            raise RuntimeError("db down")
+        return 0
+
+    async def main():
+        recon = ReconPipeline(handler, _Session, workers=1, coalesce=1, retries=0)
+        recon.start()
+        await recon.submit([1], (T0, T0))
+        await recon.submit([2], (T0, T0))
+        await recon.stop()
+        return recon.stats()
+
+    stats = asyncio.run(main())
+    assert seen == [1, 2]
+    assert (stats["failures"], stats["rounds"], stats["dropped"]) == (1, 1, 1)
+
+
+def test_transient_failure_is_retried():
+    attempts = []
+
+    async def handler(session, trade_ids, ts_range):
+        attempts.append(trade_ids)
+        if len(attempts) < 3:
+            raise RuntimeError("connection reset")
+        return 0
+
+    async def main():
+        recon = ReconPipeline(handler, _Session, workers=1, retries=3, retry_delay=0.001)
+        recon.start()
+        await recon.submit([1, 2], (T0, T0))
+        await recon.stop()
+        return recon.stats()
+
+    stats = asyncio.run(main())
+    assert attempts == [[1, 2]] * 3
+    assert (stats["failures"], stats["rounds"], stats["trades"], stats["dropped"]) == (2, 1, 2, 0)
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from app.service import rules
+
+
+def test_default_rules_compile_to_exact_qty_checks():
+    sql = rules.compile_sql(rules.DEFAULT_RULES)
+    assert "WHEN cp.trade_id IS NULL THEN 'Missing Trade'" in sql
+    assert "WHEN cp.qty > t.qty THEN 'Quantity Mismatch: Overstated'" in sql
+    assert "WHEN cp.qty < t.qty THEN 'Quantity Mismatch: Understated'" in sql
+
+
+def test_tolerances_and_quoting():
+    sql = rules.compile_sql((
+        rules.MatchRule("price", "eq", "Price's off", abs_tol=0.01, rel_tol=0.001),
+        rules.MatchRule("trade_ts", "eq", "Timestamp Drift", abs_tol=2.0),
+    ))
+    assert "abs(cp.price - t.price) > GREATEST(0.01, 0.001 * abs(t.price)) THEN 'Price''s off'" in sql
+    assert "abs(EXTRACT(EPOCH FROM cp.trade_ts) - EXTRACT(EPOCH FROM t.trade_ts)) > 2.0" in sql
+
+
+def test_load_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"field": "price", "comparator": "eq", "reason": "Price Mismatch", "rel_tol": 0.01}]))
+    assert rules.load_rules(str(path)) == (rules.MatchRule("price", "eq", "Price Mismatch", 0.0, 0.01),)
+
+
+@pytest.mark.parametrize("rule", [
+    rules.MatchRule("venue", "eq", "x"),
+    rules.MatchRule("qty", "ne", "x"),
+    rules.MatchRule("qty", "eq", "x", abs_tol=-1),
+    rules.MatchRule("side", "gt", "x"),
+    rules.MatchRule("qty", "eq", rules.MISSING_REASON),
+])
+def test_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        rule.validate()
@@ -1,2 +1,205 @@
+import asyncio
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app import models, partitions
+from app.db import async_session
+from app.service import bulk, changes, server
+from app.service.server import (
+    RecalcCoordinator, ReconcileService, _recalc_positions, _trades_query, maintain_partitions, pb2,
+)
+
+
 def test_placeholder():
     assert True
+
+
+def test_overlapping_requests_share_one_run():
+    groups = []
+
+    async def run_group(items):
+        groups.append(items)
+        await asyncio.sleep(0.01)
+        return [item * 10 for item in items]
+
+    async def main():
+        coordinator = RecalcCoordinator(run_group, max_items=3)
+        return await asyncio.gather(*(coordinator.submit(i) for i in range(5))), coordinator
+
+    results, coordinator = asyncio.run(main())
+    assert results == [0, 10, 20, 30, 40]
+    assert groups == [[0, 1, 2], [3, 4]]
+    assert (coordinator.rounds, coordinator.items) == (2, 5)
+
+
+def test_failed_group_is_retried_item_by_item():
+    async def run_group(items):
+        await asyncio.sleep(0)
+        if "bad" in items:
+            raise ValueError("bad item")
+        return items
+
+    async def main():
+        coordinator = RecalcCoordinator(run_group)
+        first = asyncio.ensure_future(coordinator.submit("first"))
+        await asyncio.sleep(0)
+        return await asyncio.gather(first, coordinator.submit("ok"), coordinator.submit("bad"), return_exceptions=True)
+
+    first, ok, bad = asyncio.run(main())
+    assert (first, ok) == ("first", "ok")
+    assert isinstance(bad, ValueError)
+
+
+def test_trade_page_token_round_trips():
+    query, key = _trades_query(models.CounterpartyTrade, pb2.TradeQuery(symbol="AAPL"))
+    row = models.CounterpartyTrade(id=7, trade_ts=datetime(2024, 5, 1, 12, 30))
+    token = key(row)
+    assert token == "2024-05-01T12:30:00,7"
+    where = str(_trades_query(models.CounterpartyTrade, pb2.TradeQuery(page_token=token))[0])
+    assert "ORDER BY counterparty_trades.trade_ts DESC, counterparty_trades.id DESC" in where
+    assert "(counterparty_trades.trade_ts, counterparty_trades.id) <" in where
+    with pytest.raises(ValueError):
+        _trades_query(models.Trade, pb2.TradeQuery(page_token="junk"))
+
+
+def test_grouped_chunks_book_each_staged_row_once(run_db):
+    ts = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    mixed = [("AAPL", "BUY", 10, 100.0, ts, "a-1"), ("AAPL", "SELL", 5, 101.0, ts, None)]
+    keyed = [("MSFT", "BUY", 7, 300.0, ts, "m-1"), ("MSFT", "BUY", 7, 300.0, ts, "a-1")]
+
+    async def main():
+        results = await ReconcileService(ingest_engine="bulk")._ingest_group([mixed, keyed])
+        async with async_session() as session:
+            count = (await session.execute(text("SELECT count(*) FROM trades"))).scalar_one()
+        return results, count
+
+    results, count = run_db(main)
+    (first, first_new, _), (second, second_new, _) = results
+    assert (first_new, second_new, count) == (2, 1, 3)
+    assert second[1] == first[0]  # a-1 again, booked by the earlier chunk
+
+
+def test_recalcs_of_different_symbols_do_not_wait_for_each_other(run_db):
+    ts = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+    async def main():
+        async with async_session() as session:
+            _, aapl = await bulk.copy_trades(session, [("AAPL", "BUY", 10, 100.0, ts, None)])
+            _, msft = await bulk.copy_trades(session, [("MSFT", "SELL", 4, 300.0, ts, None)])
+            await session.commit()
+        async with async_session() as first, async_session() as second:
+            await _recalc_positions(first, aapl, (ts, ts))  # holds its row lock until commit
+            await second.execute(text("SET LOCAL lock_timeout = '1s'"))
+            await _recalc_positions(second, msft, (ts, ts))
+            await second.commit()
+            await first.commit()
+        async with async_session() as session:
+            return (await session.execute(text("SELECT symbol, net_qty FROM positions ORDER BY symbol"))).all()
+
+    assert run_db(main) == [("AAPL", 10), ("MSFT", -4)]
+
+
+def test_concurrent_chunks_are_booked_in_shared_transactions(run_db):
+    ts = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    chunks = [[("AAPL", "BUY", 10 + i, 100.0, ts, f"c{i}-{j}") for j in range(3)] for i in range(5)]
+
+    async def main():
+        service = ReconcileService(ingest_engine="bulk")
+        results = await asyncio.gather(*(service._ingest_chunk(rows) for rows in chunks))
+        async with async_session() as session:
+            position = (await session.execute(text("SELECT net_qty, trade_count FROM positions"))).one()
+        return results, position, service.chunks
+
+    results, position, coordinator = run_db(main)
+    assert (coordinator.rounds, coordinator.items) == (1, 5)  # all submitted before the leader first ran
+    assert [new for _, new, _ in results] == [3] * 5
+    assert len({i for ids, _, _ in results for i in ids}) == 15
+    assert position == (sum(3 * (10 + i) for i in range(5)), 15)
+
+
+async def _stream(messages):
+    for message in messages:
+        yield message
+
+
+def test_resent_keyed_trade_with_naive_timestamp_is_a_duplicate(run_db):
+    trade = pb2.Trade(symbol="AAPL", side="BUY", qty=5, price=100.0, trade_ts="2024-05-01T12:00:00", external_id="n1")
+
+    async def main():
+        service = ReconcileService(ingest_engine="bulk")
+        first = await service.IngestTrades(_stream([trade]), None)
+        again = await service.IngestTrades(_stream([trade]), None)
+        return first, again
+
+    first, again = run_db(main)
+    assert (first.inserted, first.duplicates) == (1, 0)
+    assert (again.inserted, again.duplicates) == (0, 1)
+
+
+def test_chunk_may_mix_naive_and_aware_timestamps(run_db):
+    naive = datetime(2024, 5, 1, 12, 0)
+    aware = datetime(2024, 5, 1, 14, 0, tzinfo=timezone.utc)
+    rows = [("AAPL", "BUY", 5, 100.0, naive, None), ("AAPL", "SELL", 2, 101.0, aware, None)]
+
+    async def main():
+        _, new, _ = await ReconcileService(ingest_engine="bulk")._ingest_chunk(rows)
+        async with async_session() as session:
+            stamps = (await session.execute(text("SELECT trade_ts FROM trades ORDER BY trade_ts"))).scalars().all()
+        return new, stamps
+
+    new, stamps = run_db(main)
+    assert new == 2
+    assert stamps == [naive.replace(tzinfo=timezone.utc), aware]
+
+
+def test_retiring_partitions_moves_the_data_version(run_db):
+    old = datetime(2020, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    async def main():
+        async with async_session() as session:
+            await partitions._create_day(await session.connection(), "trades", date(2020, 1, 1))
+            await bulk.copy_trades(session, [("AAPL", "BUY", 1, 1.0, old, None)])
+            await session.commit()
+            before = await changes.data_version(session)
+        await maintain_partitions(retention_days=30)
+        async with async_session() as session:
+            count = (await session.execute(text("SELECT count(*) FROM trades"))).scalar_one()
+            return count, await changes.data_version(session) - before
+
+    assert run_db(main) == (0, 1)
+
+
+def test_group_failing_after_its_commit_is_not_booked_again(run_db, monkeypatch):
+    ts = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    chunks = [[("AAPL", "BUY", 1, 100.0, ts, None)] * 2, [("MSFT", "SELL", 1, 300.0, ts, None)]]
+    real_session, lost = server.async_session, []
+
+    def session_losing_first_commit_ack():
+        session = real_session()
+        commit = session.commit
+
+        async def commit_then_fail():
+            await commit()
+            if not lost:
+                lost.append(True)
+                raise ConnectionResetError("connection lost after COMMIT")
+
+        session.commit = commit_then_fail
+        return session
+
+    monkeypatch.setattr(server, "async_session", session_losing_first_commit_ack)
+
+    async def main():
+        service = ReconcileService(ingest_engine="bulk")
+        results = await asyncio.gather(*(service._ingest_chunk(rows) for rows in chunks))
+        async with real_session() as session:
+            count = (await session.execute(text("SELECT count(*) FROM trades"))).scalar_one()
+            counted = (await session.execute(text("SELECT sum(trade_count) FROM positions"))).scalar_one()
+        return results, count, counted
+
+    results, count, counted = run_db(main)
+    assert lost
+    assert [new for _, new, _ in results] == [2, 1]
+    assert (count, counted) == (3, 3)
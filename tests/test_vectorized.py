@@ -0,0 +1,55 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.service import rules
+from app.service import vectorized as v
+
+OVERSTATED, UNDERSTATED = 2, 3  # codes of the default rules' reasons
+
+
+def _ids(*values):
+    return np.array(values, dtype=np.int64)
+
+
+def test_match_reasons():
+    trade_id = _ids(1, 2, 3, 4)
+    booked = {"qty": np.array([10.0, 10.0, 10.0, 10.0])}
+    # trade 1 confirmed, 2 overstated, 3 understated, 4 missing
+    cp = {"qty": np.array([7.0, 10.0, 12.0])}
+    codes = v.match(trade_id, booked, _ids(3, 1, 2), _ids(1, 2, 3), cp)
+    assert codes.tolist() == [v.OK, OVERSTATED, UNDERSTATED, v.MISSING]
+
+
+def test_latest_counterparty_row_wins():
+    cp = {"qty": np.array([10.0, 1.0, 99.0])}
+    codes = v.match(_ids(5), {"qty": np.array([10.0])}, _ids(5, 5, 5), _ids(9, 4, 7), cp)
+    assert codes.tolist() == [v.OK]
+
+
+def test_no_counterparty_rows():
+    codes = v.match(_ids(1, 2), {"qty": np.array([1.0, 2.0])}, _ids(), _ids(), {"qty": np.array([])})
+    assert codes.tolist() == [v.MISSING, v.MISSING]
+
+
+def test_tolerances_and_rule_order():
+    match_rules = (
+        rules.MatchRule("side", "eq", "Side Mismatch"),
+        rules.MatchRule("price", "eq", "Price Mismatch", abs_tol=0.01, rel_tol=0.001),
+    )
+    booked = {"side": np.array([1, 1, 1]), "price": np.array([100.0, 100.0, 100.0])}
+    # within the 0.1 relative tolerance, outside it, and a side flip that also moves the price
+    cp = {"side": np.array([1, 1, 2]), "price": np.array([100.05, 100.5, 120.0])}
+    codes = v.match(_ids(1, 2, 3), booked, _ids(1, 2, 3), _ids(1, 2, 3), cp, rules=match_rules)
+    reasons = rules.reasons(match_rules)
+    assert [reasons[c - 1] if c else None for c in codes.tolist()] == [None, "Price Mismatch", "Side Mismatch"]
+
+
+def test_diff_only_reports_changes():
+    trade_id = _ids(4, 1, 3, 2)
+    codes = np.array([v.MISSING, v.OK, UNDERSTATED, OVERSTATED], dtype=np.int8)
+    # 1 was missing and is now confirmed, 3 keeps its reason, 2 changes reason, 4 is new
+    open_code = np.array([v.MISSING, UNDERSTATED, UNDERSTATED], dtype=np.int32)
+    resolved, changed, changed_codes = v.diff(trade_id, codes, _ids(1, 2, 3), open_code)
+    assert resolved.tolist() == [1]
+    assert sorted(zip(changed.tolist(), changed_codes.tolist())) == [(2, OVERSTATED), (4, v.MISSING)]